@@ -1,14 +1,22 @@
+import hmac
 import json
 import os
-from typing import TypedDict, List
-from flask import Flask, request, jsonify
+from typing import TypedDict, List, Optional
+from flask import Flask, request, jsonify, Response, stream_with_context
 from flask_cors import CORS
+from langgraph.config import get_config, get_stream_writer
 from langgraph.graph import StateGraph, END
 
-from models.symptom_model import predict_multilingual
+from models.symptom_service import (
+    predict_multilingual, start_background_warmup, model_status,
+    metrics as symptom_metrics
+)
 from models.ocr_model import predict_ocr
+from models.jobs import JobManager, MemoryJobStore, QueueFull, SQLiteJobStore
+from models.prediction_cache import PredictionCache
+from models.knowledge_store import dataset_name, get_store, knowledge_metrics, reload_all, reload_store
 from models.diet_model import get_diet_advice
-from models.disease_info_model import get_disease_info
+from models.disease_info_model import get_disease_info, get_disease_info_by_id
 
 # ------------------------------------------------- 
 # Flask App
@@ -16,43 +24,20 @@ from models.disease_info_model import get_disease_info
 app = Flask(__name__)
 CORS(app)
 
+# Load and warm the symptom model in the background so the first real
+# request does not pay for it; /ready reports when it is done.
+if os.environ.get("SYMPTOM_MODEL_PRELOAD", "1") == "1":
+    start_background_warmup()
+
 # -------------------------------------------------
 # Load Medical Data
 # -------------------------------------------------
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-DATA_DIR = os.path.join(BASE_DIR, "data")
-
-with open(os.path.join(DATA_DIR, "disease.json"), encoding="utf-8") as f:
-    raw_disease_list = json.load(f)
-
-# Re-index DISEASE_DB by disease_label and language
-DISEASE_DB = {}
-for entry in raw_disease_list:
-    did = str(entry.get("disease_label", ""))
-    lang = entry.get("lang", "en")
-    if did:
-        DISEASE_DB.setdefault(did, {})[lang] = entry
-
-# Create Reverse Mapping (Name -> ID) for OCR lookup
-DISEASE_NAME_TO_ID = {}
-for entry in raw_disease_list:
-    name = entry.get("disease_name", "").lower()
-    did = entry.get("disease_label")
-    if name and did is not None:
-        DISEASE_NAME_TO_ID[name] = str(did)
-    # Also map aliases
-    for alias in entry.get("aliases", []):
-        DISEASE_NAME_TO_ID[alias.lower()] = str(did)
-
-with open(os.path.join(DATA_DIR, "recommendation.json"), encoding="utf-8") as f:
-    rec_list = json.load(f)
-
-PRESCRIPTION_DB = {}
-for item in rec_list:
-    did = str(item.get("disease_id", ""))
-    lang = item.get("lang", "en")
-    if did:
-        PRESCRIPTION_DB.setdefault(did, {})[lang] = item.get("recommendation", {})
+
+# Diseases and recommendations, indexed by (disease_id, lang) and by name,
+# come from get_store(dataset): shared with the diet and disease info models
+# and loaded on first use (from the compiled snapshot when it is current).
+# A request picks the dataset generation with its "dataset" field.
 
 # -------------------------------------------------
 # LangGraph State
@@ -67,6 +52,9 @@ class AgentState(TypedDict):
     urgency: str
     language: str
     viewed_sections: List[str]  # Track which sections have been viewed
+    confidence: Optional[float]  # Model probability of the predicted disease (score decoding only)
+    model_variant: str  # Symptom model adapter to use; empty = weighted split
+    dataset: str  # Knowledge dataset generation; empty = DEFAULT_DATASET
 
 
 
@@ -168,6 +156,17 @@ def start_node(state: AgentState):
     }
 
 
+def stream_callback(event):
+    """
+    A callback forwarding text to /chat/stream clients as `event` events, or
+    None when the graph is not being streamed (/chat, /jobs).
+    """
+    if not get_config().get("configurable", {}).get("stream"):
+        return None
+    writer = get_stream_writer()
+    return lambda text: writer({"event": event, "text": text})
+
+
 def symptom_checker_node(state: AgentState):
     print(f"[SYMPTOM_CHECKER_NODE] Processing message: {state['message'][:50]}...")
     
@@ -189,22 +188,28 @@ def symptom_checker_node(state: AgentState):
         }
 
     try:
-        result = predict_multilingual(msg)
+        result = predict_multilingual(
+            msg,
+            variant=state.get("model_variant") or None,
+            # Only streamed requests get a token callback; the rest keep the micro-batcher
+            on_token=stream_callback("token"),
+        )
         print(f"[SYMPTOM_CHECKER_NODE] Model result: {result}")
         
         if result is None:
             return {
                 "response": get_text("en", "error_model"),
                 "options": ["Start Over"],
-                "step": "start"
+                "step": "error",
+                "selected_option": ""
             }
         
         detected_lang = result.get("language", "en")
         did = str(result.get("disease_id", ""))
         
         # Get localized disease name from DB if available
-        db_entry = DISEASE_DB.get(did, {}).get(detected_lang) or DISEASE_DB.get(did, {}).get("en")
-        disease_name = db_entry.get("disease_name", result.get("disease", "Unknown")) if db_entry else result.get("disease", "Unknown")
+        db_entry = get_store(state.get("dataset")).disease(did, detected_lang)
+        disease_name = db_entry.disease_name if db_entry else result.get("disease", "Unknown")
         
         urgency = result.get("urgency", "Unknown")
 
@@ -226,6 +231,8 @@ def symptom_checker_node(state: AgentState):
             "disease_id": did,
             "urgency": urgency,
             "language": detected_lang,
+            "confidence": result.get("confidence"),
+            "model_variant": result.get("model_variant", ""),
             "step": "symptom_result"
         }
     except Exception as e:
@@ -235,97 +242,135 @@ def symptom_checker_node(state: AgentState):
         return {
             "response": f"Error processing symptoms: {str(e)}",
             "options": ["Start Over"],
-            "step": "start"
+            "step": "error",
+            "selected_option": ""
         }
 
 
-def disease_description_node(state: AgentState):
-    print(f"[DISEASE_DESCRIPTION_NODE] disease_id={state.get('disease_id')}, lang={state.get('language')}")
-    did = str(state.get("disease_id", ""))
-    lang = state.get("language", "en")
-    
-    # Get translation-specific details
-    disease_entry = DISEASE_DB.get(did, {}).get(lang) or DISEASE_DB.get(did, {}).get("en", {})
-    disease_name = disease_entry.get("disease_name", "Unknown")
-    definition = disease_entry.get("definitions", "Definition not available.")
-    symptoms = disease_entry.get("symptoms", [])
-    
+# -------------------------------------------------
+# Render cache for the description / recommendation nodes
+# -------------------------------------------------
+# Their output depends only on (dataset and its version, disease, language,
+# whether the other section was already viewed), so each combination is
+# rendered once and memoized in a bounded LRU. The dataset version in the
+# key, and a clear() when it changes, invalidate everything on a reload.
+RENDER_CACHE_SIZE = int(os.environ.get("RENDER_CACHE_SIZE", "8192"))
+render_cache = PredictionCache(maxsize=RENDER_CACHE_SIZE, ttl_seconds=float("inf"))
+_render_versions = {}
+
+
+def render_description(store, did, lang, recommendation_viewed):
+    disease_entry = store.disease(did, lang)
+    disease_name = disease_entry.disease_name if disease_entry else "Unknown"
+    definition = disease_entry.definitions if disease_entry else None
+    if definition is None:
+        definition = "Definition not available."
+    symptoms = disease_entry.symptoms if disease_entry else ()
+
     symptoms_text = ", ".join(symptoms) if symptoms else get_text(lang, "no_sym")
-    
+
     res_text = (
         f"{get_text(lang, 'disease_label')} {disease_name}\n\n"
         f"{get_text(lang, 'def_label')} {definition}\n\n"
         f"{get_text(lang, 'sym_label')} {symptoms_text}"
     )
-    
-    # Track that description has been viewed
-    viewed = state.get("viewed_sections", [])
-    if "description" not in viewed:
-        viewed = viewed + ["description"]
-    
+
     # Only show Diet Recommendation if it hasn't been viewed yet
-    if "recommendation" in viewed:
+    if recommendation_viewed:
         # Both have been viewed, only show Start Over
         opts = [get_text(lang, "start_opt")]
     else:
         # Show remaining option and Start Over
         opts = [get_text(lang, "rec_opt"), get_text(lang, "start_opt")]
-
-    return {
-        "response": res_text,
-        "options": opts,
-        "disease_id": did,
-        "urgency": state.get("urgency", ""),
-        "language": lang,
-        "step": "disease_description",
-        "viewed_sections": viewed
-    }
+    return {"response": res_text, "options": opts}
 
 
-def recommendation_node(state: AgentState):
-    print(f"[RECOMMENDATION_NODE] disease_id={state.get('disease_id')}, lang={state.get('language')}")
-    did = str(state.get("disease_id", ""))
-    lang = state.get("language", "en")
-
-    pres_lang_map = PRESCRIPTION_DB.get(did, {})
-    pres = pres_lang_map.get(lang) or pres_lang_map.get("en")
+def render_recommendation(store, did, lang, description_viewed):
+    pres = store.recommendation(did, lang)
 
     if not pres:
         return {
             "response": get_text(lang, "no_data"),
             "options": [get_text(lang, "start_opt")],
             "step": "start",
-            "selected_option": ""
         }
 
     response = get_text(lang, "rec_header") + "\n"
 
-    if pres.get("do"):
-        response += f"\n{get_text(lang, 'do_label')}\n" + "\n".join(f"- {x}" for x in pres["do"])
+    if pres.do:
+        response += f"\n{get_text(lang, 'do_label')}\n" + "\n".join(f"- {x}" for x in pres.do)
 
-    if pres.get("dont"):
-        response += f"\n\n{get_text(lang, 'dont_label')}\n" + "\n".join(f"- {x}" for x in pres["dont"])
+    if pres.dont:
+        response += f"\n\n{get_text(lang, 'dont_label')}\n" + "\n".join(f"- {x}" for x in pres.dont)
 
-    if pres.get("home_remedies"):
-        response += f"\n\n{get_text(lang, 'remedy_label')}\n" + "\n".join(f"- {x}" for x in pres["home_remedies"])
+    if pres.home_remedies:
+        response += f"\n\n{get_text(lang, 'remedy_label')}\n" + "\n".join(f"- {x}" for x in pres.home_remedies)
 
-    # Track that recommendation has been viewed
-    viewed = state.get("viewed_sections", [])
-    if "recommendation" not in viewed:
-        viewed = viewed + ["recommendation"]
-    
     # Only show Disease Description if it hasn't been viewed yet
-    if "description" in viewed:
+    if description_viewed:
         # Both have been viewed, only show Start Over
         opts = [get_text(lang, "start_opt")]
     else:
         # Show remaining option and Start Over
         opts = [get_text(lang, "desc_opt"), get_text(lang, "start_opt")]
+    return {"response": response, "options": opts, "step": "recommendation"}
+
+
+_RENDERERS = {"description": render_description, "recommendation": render_recommendation}
+
+
+def rendered(section, did, lang, other_viewed, dataset=None):
+    """The memoized render of a section; a fresh dict the caller may modify."""
+    store = get_store(dataset)
+    if _render_versions.get(store.dataset) != store.version:
+        if store.dataset in _render_versions:
+            render_cache.clear()  # the dataset was reloaded
+        _render_versions[store.dataset] = store.version
+    key = (store.dataset, store.version, section, did, lang, other_viewed)
+    result = render_cache.get(key)
+    if result is None:
+        result = _RENDERERS[section](store, did, lang, other_viewed)
+        render_cache.put(key, result)
+    return {**result, "options": list(result["options"])}
+
+
+def disease_description_node(state: AgentState):
+    print(f"[DISEASE_DESCRIPTION_NODE] disease_id={state.get('disease_id')}, lang={state.get('language')}")
+    did = str(state.get("disease_id", ""))
+    lang = state.get("language", "en")
+
+    # Track that description has been viewed
+    viewed = state.get("viewed_sections", [])
+    if "description" not in viewed:
+        viewed = viewed + ["description"]
 
     return {
-        "response": response,
-        "options": opts,
-        "step": "recommendation",
+        **rendered("description", did, lang, "recommendation" in viewed, state.get("dataset")),
+        "disease_id": did,
+        "urgency": state.get("urgency", ""),
+        "language": lang,
+        "step": "disease_description",
+        "viewed_sections": viewed
+    }
+
+
+def recommendation_node(state: AgentState):
+    print(f"[RECOMMENDATION_NODE] disease_id={state.get('disease_id')}, lang={state.get('language')}")
+    did = str(state.get("disease_id", ""))
+    lang = state.get("language", "en")
+
+    viewed = state.get("viewed_sections", [])
+    result = rendered("recommendation", did, lang, "description" in viewed, state.get("dataset"))
+    if result["step"] == "start":
+        # No recommendation data
+        return {**result, "selected_option": ""}
+
+    # Track that recommendation has been viewed
+    if "recommendation" not in viewed:
+        viewed = viewed + ["recommendation"]
+
+    return {
+        **result,
         "selected_option": "",
         "viewed_sections": viewed
     }
@@ -333,7 +378,7 @@ def recommendation_node(state: AgentState):
 
 def disease_info_node(state: AgentState):
     print(f"[DISEASE_INFO_NODE] Processing: {state['message']}")
-    info = get_disease_info(state["message"])
+    info = get_disease_info(state["message"], dataset=state.get("dataset"))
 
     if "error" in info:
         return {
@@ -381,7 +426,7 @@ def diet_node(state: AgentState):
     # Use detected language if available, otherwise let get_diet_advice detect/default
     lang = state.get("language") 
     
-    advice = get_diet_advice(query, language=lang)
+    advice = get_diet_advice(query, language=lang, dataset=state.get("dataset"))
 
     if "error" in advice:
         return {
@@ -412,11 +457,11 @@ def diet_node(state: AgentState):
 
 def ocr_node(state: AgentState):
     print(f"[OCR_NODE] Processing OCR request")
-    result = predict_ocr(state["message"])
+    result = predict_ocr(state["message"], on_text=stream_callback("ocr_text"))
 
     # Extract Predicted Disease
     disease_name = result.get("predicted_disease", "")
-    disease_id = DISEASE_NAME_TO_ID.get(disease_name.lower())
+    disease_id = get_store(state.get("dataset")).find_id(disease_name)
 
     response_text = (
         f"OCR Text:\n{result.get('text', '')}\n\n"
@@ -462,6 +507,13 @@ def router(state: AgentState):
     if "Start Over" in option:
         return "start"
 
+    # A failed step ends the turn so its message reaches the user; a new
+    # request from there behaves like one from the menu
+    if step == "error":
+        if not option:
+            return END
+        step = "start"
+
     # From dispatcher: route based on step and option
     if step == "start":
         if not option:
@@ -577,14 +629,27 @@ graph = graph.compile()
 # -------------------------------------------------
 @app.route("/", methods=["GET"])
 def health():
-    return jsonify({"status": "Backend running", "endpoints": ["/chat"]})
+    return jsonify({"status": "Backend running", "endpoints": [
+        "/chat", "/chat/stream", "/jobs", "/diseases/search", "/diseases/<id>", "/diseases/<id>/diet",
+        "/ready", "/metrics",
+    ]})
 
 
-@app.route("/chat", methods=["POST"])
-def chat():
-    data = request.json or {}
+@app.route("/ready", methods=["GET"])
+def ready():
+    # 503 until the model is loaded and warm, so the orchestrator holds traffic
+    status = model_status()
+    return jsonify(status), (200 if status.get("ready") else 503)
 
-    state: AgentState = {
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    return jsonify({**symptom_metrics(), "jobs": jobs.metrics(), "knowledge": knowledge_metrics(),
+                    "render_cache": render_cache.metrics()})
+
+
+def initial_state(data) -> AgentState:
+    return {
         "message": data.get("message", ""),
         "selected_option": data.get("selected_option", "") or data.get("option", ""),
         "step": data.get("step", "start"),
@@ -593,27 +658,293 @@ def chat():
         "disease_id": data.get("disease_id", ""),
         "urgency": data.get("urgency", ""),
         "language": data.get("language", "en"),
-        "viewed_sections": data.get("viewed_sections", [])
+        "viewed_sections": data.get("viewed_sections", []),
+        "model_variant": data.get("model_variant", ""),
+        "dataset": data.get("dataset", "")
     }
 
+
+def final_payload(state, result):
+    # Ensure result has all necessary fields for frontend
+    return {**state, **(result if isinstance(result, dict) else {})}
+
+
+def error_payload(state, e):
+    return {
+        **state,
+        "response": f"Error in backend: {str(e)}",
+        "options": ["Start Over"],
+        "step": "start"
+    }
+
+
+def run_chat(data):
+    """A /chat request run to completion; returns the body /chat sends."""
+    state = initial_state(data)
     try:
         print(f"[-] Processing step: {state['step']}, option: {state['selected_option']}")
-        result = graph.invoke(state)
-        
-        # Ensure result has all necessary fields for frontend
-        final_result = {**state, **(result if isinstance(result, dict) else {})}
-        
+        final_result = final_payload(state, graph.invoke(state))
         print(f"[+] Result step: {final_result.get('step')}")
-        return jsonify(final_result)
+        return final_result
     except Exception as e:
         import traceback
         traceback.print_exc()
-        return jsonify({
-            **state,
-            "response": f"Error in backend: {str(e)}",
-            "options": ["Start Over"],
-            "step": "start"
-        })
+        return error_payload(state, e)
+
+
+def dataset_error(data):
+    """A 400 response if the request names an unknown dataset, else None."""
+    try:
+        dataset_name(data.get("dataset"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return None
+
+
+@app.route("/chat", methods=["POST"])
+def chat():
+    data = request.json or {}
+    return dataset_error(data) or jsonify(run_chat(data))
+
+
+# -------------------------------------------------
+# Job API
+# -------------------------------------------------
+# POST /jobs takes a /chat body and answers at once with a job id; the graph
+# runs on a bounded worker pool. GET /jobs/<id> polls, optionally waiting
+# (?wait=<seconds>) for the job to finish. DELETE /jobs/<id> cancels.
+# JOB_STORE=sqlite shares jobs between worker processes through JOB_DB.
+JOB_STORE = os.environ.get("JOB_STORE", "memory")
+JOB_DB = os.environ.get("JOB_DB", os.path.join(BASE_DIR, ".jobs.sqlite3"))
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "2"))
+JOB_MAX_PENDING = int(os.environ.get("JOB_MAX_PENDING", "64"))
+JOB_TTL_S = float(os.environ.get("JOB_TTL_S", "3600"))
+JOB_MAX_WAIT_S = float(os.environ.get("JOB_MAX_WAIT_S", "30"))
+
+jobs = JobManager(
+    run_chat,
+    SQLiteJobStore(JOB_DB) if JOB_STORE == "sqlite" else MemoryJobStore(),
+    max_workers=JOB_WORKERS,
+    max_pending=JOB_MAX_PENDING,
+    ttl_seconds=JOB_TTL_S,
+    name="chat-jobs",
+)
+
+
+def job_view(job):
+    return {
+        "job_id": job["id"],
+        "status": job["status"],
+        "result": job["result"],
+        "error": job["error"],
+        "created_at": job["created_at"],
+        "started_at": job["started_at"],
+        "finished_at": job["finished_at"],
+        "expires_at": job["expires_at"],
+    }
+
+
+@app.route("/jobs", methods=["POST"])
+def create_job():
+    data = request.json or {}
+    error = dataset_error(data)
+    if error:
+        return error
+    try:
+        job = jobs.submit(data)
+    except QueueFull as e:
+        return jsonify({"error": f"Too many jobs: {e}"}), 429
+    print(f"[JOBS] Queued {job['id']}")
+    return jsonify({**job_view(job), "status_url": f"/jobs/{job['id']}"}), 202
+
+
+@app.route("/jobs/<job_id>", methods=["GET"])
+def get_job(job_id):
+    try:
+        wait = min(max(float(request.args.get("wait", 0)), 0.0), JOB_MAX_WAIT_S)
+    except ValueError:
+        return jsonify({"error": "wait must be a number of seconds"}), 400
+    job = jobs.get(job_id, wait=wait)
+    if job is None:
+        return jsonify({"error": "Unknown or expired job"}), 404
+    return jsonify(job_view(job))
+
+
+@app.route("/jobs/<job_id>", methods=["DELETE"])
+def cancel_job(job_id):
+    job = jobs.cancel(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown or expired job"}), 404
+    if job["status"] != "cancelled":
+        return jsonify({**job_view(job), "error": "Job already finished"}), 409
+    return jsonify(job_view(job))
+
+
+def sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@app.route("/chat/stream", methods=["POST"])
+def chat_stream():
+    """
+    Same request body as /chat, answered as Server-Sent Events while the
+    graph runs:
+        node      a graph node started            {"node": name}
+        update    a node finished                 {"node": name, "update": {...}}
+        ocr_text  OCR text came back              {"text": ...}
+        token     newly generated symptom tokens  {"text": ...}
+        final     the exact body /chat would return
+    """
+    data = request.json or {}
+    error = dataset_error(data)
+    if error:
+        return error
+    state = initial_state(data)
+
+    def events():
+        # Sent before any work so the client sees the first byte immediately
+        yield sse("start", {"step": state["step"]})
+        result = None
+        try:
+            print(f"[-] Streaming step: {state['step']}, option: {state['selected_option']}")
+            for mode, chunk in graph.stream(state, config={"configurable": {"stream": True}},
+                                            stream_mode=["tasks", "updates", "custom", "values"]):
+                if mode == "values":
+                    result = chunk
+                elif mode == "tasks" and "input" in chunk:
+                    yield sse("node", {"node": chunk["name"]})
+                elif mode == "updates":
+                    for node, update in chunk.items():
+                        yield sse("update", {"node": node, "update": update or {}})
+                elif mode == "custom":
+                    event = dict(chunk)
+                    yield sse(event.pop("event", "custom"), event)
+            final_result = final_payload(state, result)
+            print(f"[+] Streamed result step: {final_result.get('step')}")
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            final_result = error_payload(state, e)
+        yield sse("final", final_result)
+
+    return Response(
+        stream_with_context(events()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# -------------------------------------------------
+# Disease name search (client-side autocomplete)
+# -------------------------------------------------
+SEARCH_MAX_LIMIT = 50
+
+
+@app.route("/diseases/search", methods=["GET"])
+def search_diseases():
+    """
+    GET /diseases/search?q=diabetis&lang=ta&limit=10[&dataset=plain] ->
+    ranked candidates [{"disease_id", "name", "matched", "lang", "score"}],
+    "name" in lang.
+    """
+    error = dataset_error(request.args)
+    if error:
+        return error
+    query = request.args.get("q", "")
+    try:
+        limit = min(max(int(request.args.get("limit", 10)), 1), SEARCH_MAX_LIMIT)
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    lang = request.args.get("lang") or None
+    store = get_store(request.args.get("dataset"))
+    return jsonify({"query": query, "results": store.search(query, lang=lang, limit=limit)})
+
+
+# -------------------------------------------------
+# Cacheable disease reads
+# -------------------------------------------------
+# GET /diseases/<id>?lang=ta[&dataset=plain] and /diseases/<id>/diet?lang=
+# serve what the disease info and diet nodes show, with the same English
+# fallback, as plain cacheable GETs. The strong ETag is derived from the
+# dataset version, so it changes exactly when a reload changes the data;
+# If-None-Match answers 304 without building the body.
+DISEASE_CACHE_MAX_AGE_S = int(os.environ.get("DISEASE_CACHE_MAX_AGE_S", "300"))
+
+
+def cacheable_json(resource, build):
+    """
+    build() -> body dict, with "error" set when not found (404, not cached).
+    A dataset whose files are missing or unreadable is a server fault (503),
+    answered here before build() runs against the store loaded here.
+    """
+    error = dataset_error(request.args)
+    if error:
+        return error
+    try:
+        store = get_store(request.args.get("dataset"))
+    except (OSError, ValueError) as e:
+        print(f"[ERROR] Knowledge store unavailable: {e}")
+        return jsonify({"error": "Disease database not available."}), 503
+    lang = request.args.get("lang") or "en"
+    etag = f"{store.dataset}-{store.version}-{resource}-{lang}"
+    headers = {"ETag": f'"{etag}"', "Cache-Control": f"public, max-age={DISEASE_CACHE_MAX_AGE_S}"}
+    if request.if_none_match.contains_weak(etag):
+        return Response(status=304, headers=headers)
+
+    body = build(lang, store.dataset)
+    if "error" in body:
+        return jsonify(body), 404
+    return jsonify({**body, "dataset": store.dataset, "version": store.version}), 200, headers
+
+
+@app.route("/diseases/<int:disease_id>", methods=["GET"])
+def disease_detail(disease_id):
+    return cacheable_json(
+        f"{disease_id}-info",
+        lambda lang, dataset: get_disease_info_by_id(disease_id, language=lang, dataset=dataset),
+    )
+
+
+@app.route("/diseases/<int:disease_id>/diet", methods=["GET"])
+def disease_diet(disease_id):
+    return cacheable_json(
+        f"{disease_id}-diet",
+        lambda lang, dataset: {"disease_id": str(disease_id),
+                               **get_diet_advice(str(disease_id), language=lang, dataset=dataset)},
+    )
+
+
+# -------------------------------------------------
+# Admin
+# -------------------------------------------------
+# POST /admin/reload[?dataset=<name>] rebuilds the disease and
+# recommendation indexes of one dataset (default: every loaded one) from
+# data/*.json and swaps them in without a restart (the watcher does the
+# same on its own when the files change). The route is disabled unless
+# ADMIN_TOKEN is set, and then requires it in an X-Admin-Token header.
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN", "")
+
+
+def admin_denied():
+    """A 403 response unless the request carries the configured admin token, else None."""
+    token = request.headers.get("X-Admin-Token", "")
+    if not ADMIN_TOKEN or not hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode()):
+        return jsonify({"error": "Forbidden"}), 403
+    return None
+
+
+@app.route("/admin/reload", methods=["POST"])
+def admin_reload():
+    denied = admin_denied()
+    if denied:
+        return denied
+    error = dataset_error(request.args)
+    if error:
+        return error
+    dataset = request.args.get("dataset")
+    reports = {dataset_name(dataset): reload_store(dataset)} if dataset else reload_all()
+    failed = any(report["errors"] for report in reports.values())
+    return jsonify({"datasets": reports}), (422 if failed else 200)
 
 
 # -------------------------------------------------
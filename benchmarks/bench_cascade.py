@@ -0,0 +1,115 @@
+"""
+Coverage, accuracy and latency of the cascade's local classifier.
+
+The classifier is built from data/disease.json only. In production it sees
+symptom descriptions, which the datasets do not contain, so it is evaluated
+on two sets reported separately:
+  symptoms    - SYMPTOM_QUERIES below: short hand-labelled English symptom
+                descriptions of the kind users type (small; indicative only)
+  names/defs  - the independently written names, aliases and definitions
+                of data/disease1.json (same disease labels). This measures
+                name / definition matching, not symptom understanding.
+For each confidence threshold it reports the share of queries that would
+be answered locally and the accuracy on those, i.e. the trade-off behind
+SYMPTOM_CASCADE_THRESHOLD. Urgency is learned from the LLM at runtime and
+is not part of this evaluation.
+
+Run from the backend directory:
+    python -m benchmarks.bench_cascade
+"""
+import argparse
+import time
+from collections import defaultdict
+
+from models.cascade import CentroidClassifier, load_documents
+from models.knowledge_store import get_store
+
+THRESHOLDS = (0.0, 0.3, 0.5, 0.6, 0.7, 0.8, 0.9)
+
+# (English disease name, symptom description); names are resolved to IDs
+# through the knowledge store
+SYMPTOM_QUERIES = [
+    ("Anemia", "tired all the time, pale skin, dizziness, short of breath on stairs"),
+    ("Diabetes", "frequent urination, excessive thirst, blurred vision, slow healing wounds"),
+    ("Hypertension", "morning headaches, dizziness, blurred vision, nosebleeds"),
+    ("Tuberculosis", "cough for three weeks, night sweats, weight loss, blood in sputum"),
+    ("Chikungunya", "sudden fever, severe joint pain in hands and feet, rash"),
+    ("Dengue", "high fever, severe headache behind the eyes, muscle and joint pain, rash"),
+    ("Typhoid", "fever rising day by day, stomach pain, weakness, constipation"),
+    ("Diarrhea", "loose watery stools several times a day, stomach cramps"),
+    ("Cholera", "profuse watery diarrhea like rice water, vomiting, leg cramps"),
+    ("Dehydration", "very thirsty, dry mouth, dark urine, little urine, dizziness"),
+    ("Conjunctivitis", "red itchy eyes, watery discharge, crusty eyelids in the morning"),
+    ("Asthma", "wheezing, shortness of breath, chest tightness at night"),
+    ("Influenza", "fever, chills, body aches, sore throat, dry cough"),
+    ("Pneumonia", "fever, cough with yellow phlegm, chest pain when breathing"),
+    ("Constipation", "hard stools, straining, fewer than three bowel movements a week"),
+    ("Sinusitis", "blocked nose, facial pain and pressure, thick nasal discharge"),
+    ("Food Poisoning", "vomiting and diarrhea a few hours after eating outside, stomach cramps"),
+    ("Arthritis", "stiff swollen knee joints, pain worse in the morning"),
+    ("Heat Stroke", "very high body temperature after working in the sun, confusion, no sweating"),
+    ("Gastritis", "burning upper stomach pain, bloating, nausea after meals"),
+    ("Urinary Tract Infection", "burning while urinating, frequent urge to urinate, cloudy urine"),
+    ("Ringworm", "itchy round red patch on the skin with a clear centre"),
+    ("Hypothyroidism", "weight gain, feeling cold, dry skin, constipation, tiredness"),
+    ("Hyperthyroidism", "weight loss, fast heartbeat, sweating, trembling hands"),
+    ("Cataract", "cloudy blurred vision, glare from lights, faded colours"),
+    ("Piles", "bleeding while passing stool, pain and swelling around the anus"),
+    ("Eczema", "dry itchy red patches of skin that crack"),
+    ("Acne", "pimples and blackheads on the face and back"),
+    ("Jaundice", "yellow eyes and skin, dark urine, pale stools"),
+]
+
+
+def symptom_queries():
+    store = get_store()
+    return [("en", int(store.find_id(name)), text) for name, text in SYMPTOM_QUERIES]
+
+
+def report(title, classifier, test):
+    predictions = [(lang, label, classifier.predict(text, lang)[0]) for lang, label, text in test]
+
+    print(f"{title} ({len(test)} queries)")
+    print(f"{'threshold':>10}{'local':>9}{'accuracy':>10}")
+    for threshold in THRESHOLDS:
+        answered = [(label, guess) for _, label, (guess, p) in predictions if p >= threshold]
+        correct = sum(label == guess for label, guess in answered)
+        accuracy = correct / len(answered) if answered else 0.0
+        print(f"{threshold:>10.1f}{len(answered) / len(test):>8.1%}{accuracy:>10.1%}")
+
+    per_lang = defaultdict(lambda: [0, 0])
+    for lang, label, (guess, _) in predictions:
+        per_lang[lang][0] += 1
+        per_lang[lang][1] += label == guess
+    print("top-1 accuracy per language (no threshold):")
+    for lang in sorted(per_lang):
+        total, correct = per_lang[lang]
+        print(f"{lang:>6}{total:>6}{correct / total:>8.1%}")
+    print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=3, help="timing passes over the test sets")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    classifier = CentroidClassifier(load_documents(datasets=("disease.json",)))
+    build_s = time.perf_counter() - start
+    print(f"built from {sum(len(v) for v in classifier.labels.values())} centroids in {build_s:.2f}s\n")
+
+    symptoms = symptom_queries()
+    names = load_documents(datasets=("disease1.json",))
+    report("symptom descriptions", classifier, symptoms)
+    report("names / aliases / definitions (disease1.json)", classifier, names)
+
+    test = symptoms + names
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        for lang, _, text in test:
+            classifier.predict(text, lang)
+    elapsed = time.perf_counter() - start
+    print(f"latency: {1e6 * elapsed / (args.repeat * len(test)):.0f} us/query")
+
+if __name__ == "__main__":
+    main()
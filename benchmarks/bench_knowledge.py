@@ -0,0 +1,83 @@
+"""
+Per-call latency of the diet advice and disease info lookups: the previous
+implementations (re-reading the JSON files and scanning them on every call)
+against the shared KnowledgeStore.
+
+Run from the backend directory:
+    python -m benchmarks.bench_knowledge [--runs 20]
+"""
+import argparse
+import json
+import os
+import time
+
+from models.diet_model import get_diet_advice
+from models.disease_info_model import get_disease_info
+from models.knowledge_store import DATA_DIR, KnowledgeStore
+
+
+def legacy_diet_advice(disease_name_or_id, language="en"):
+    """The old get_diet_advice: reload both files and scan linearly."""
+    with open(os.path.join(DATA_DIR, "recommendation.json"), encoding="utf-8") as f:
+        data = json.load(f)
+    disease_id = None
+    if str(disease_name_or_id).isdigit():
+        disease_id = int(disease_name_or_id)
+    else:
+        with open(os.path.join(DATA_DIR, "disease.json"), encoding="utf-8") as f:
+            for entry in json.load(f):
+                aliases = [a.lower() for a in entry.get("aliases", [])]
+                if entry.get("disease_name", "").lower() == disease_name_or_id.lower() \
+                        or disease_name_or_id.lower() in aliases:
+                    disease_id = entry.get("disease_label")
+                    break
+    for lang in (language, "en"):
+        for item in data:
+            if str(item.get("disease_id")) == str(disease_id) and item.get("lang") == lang:
+                return item["recommendation"]
+    return None
+
+
+def legacy_disease_info(disease_name):
+    with open(os.path.join(DATA_DIR, "disease.json"), encoding="utf-8") as f:
+        for entry in json.load(f):
+            if entry.get("disease_name", "").lower() == disease_name.lower():
+                return entry
+    return None
+
+
+CASES = [
+    ("diet by id", lambda: legacy_diet_advice("5", "ta"), lambda: get_diet_advice("5", language="ta")),
+    ("diet by name", lambda: legacy_diet_advice("Typhoid"), lambda: get_diet_advice("Typhoid", language="en")),
+    ("diet by alias", lambda: legacy_diet_advice("சர்க்கரை நோய்", "ta"),
+     lambda: get_diet_advice("சர்க்கரை நோய்", language="ta")),
+    ("disease info", lambda: legacy_disease_info("Cholera"), lambda: get_disease_info("Cholera")),
+]
+
+
+def time_call(fn, runs):
+    fn()  # warm-up (and, for the store, the one-time load)
+    start = time.perf_counter()
+    for _ in range(runs):
+        fn()
+    return (time.perf_counter() - start) / runs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    KnowledgeStore()
+    print(f"one-time store load: {(time.perf_counter() - start) * 1000:.1f} ms\n")
+
+    print(f"{'case':>14}{'before (ms)':>13}{'after (us)':>12}{'speed-up':>10}")
+    for name, before, after in CASES:
+        t_before = time_call(before, args.runs)
+        t_after = time_call(after, args.runs * 100)
+        print(f"{name:>14}{t_before * 1e3:>13.2f}{t_after * 1e6:>12.2f}{t_before / t_after:>9.0f}x")
+
+
+if __name__ == "__main__":
+    main()
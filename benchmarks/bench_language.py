@@ -0,0 +1,131 @@
+"""
+Accuracy and speed of the language detectors on text from the disease
+datasets: the old first-character unicode check, plain langdetect (what
+prepare_input used) and models.language.detect_language.
+
+The corpus is every disease name, alias and definition in data/disease.json
+and data/disease1.json, labelled with its entry's "lang", plus a few mixed
+script and romanized symptom strings.
+
+Run from the backend directory:
+    python -m benchmarks.bench_language
+"""
+import argparse
+import json
+import os
+import time
+from collections import defaultdict
+
+from models.language import SUPPORTED_LANGUAGES, detect_language
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+EXTRA_SAMPLES = [
+    ("fever and காய்ச்சல், தலைவலி", "ta"),
+    ("BP high hai, सिर में दर्द है", "hi"),
+    ("मला ताप आहे आणि डोके दुखत आहे", "mr"),
+    ("mujhe bukhar hai aur sardard", "en"),
+    ("kaichal and thalaivali", "en"),
+    ("cough, cold, sore throat", "en"),
+    ("জ্বৰ আৰু মূৰৰ বিষ", "as"),
+    ("জ্বর এবং মাথাব্যথা", "bn"),
+]
+
+
+def legacy_detect(text):
+    """The detector previously duplicated in symptom_model and diet_model."""
+    for ch in text:
+        code = ord(ch)
+        if 0x0B80 <= code <= 0x0BFF:
+            return "ta"
+        elif 0x0900 <= code <= 0x097F:
+            return "mr" if "ळ" in text else "hi"
+        elif 0x0C00 <= code <= 0x0C7F:
+            return "te"
+        elif 0x0D00 <= code <= 0x0D7F:
+            return "ml"
+        elif 0x0C80 <= code <= 0x0CFF:
+            return "kn"
+        elif 0x0A80 <= code <= 0x0AFF:
+            return "gu"
+        elif 0x0980 <= code <= 0x09FF:
+            return "as" if "ৰ" in text else "bn"
+    return "en"
+
+
+def langdetect_detect(text):
+    from langdetect import DetectorFactory, detect, LangDetectException
+    DetectorFactory.seed = 0
+    try:
+        return detect(text)
+    except LangDetectException:
+        return "en"
+
+
+def load_corpus(per_language=None):
+    samples = []
+    for name in ("disease.json", "disease1.json"):
+        with open(os.path.join(DATA_DIR, name), encoding="utf-8") as f:
+            for entry in json.load(f):
+                lang = entry.get("lang")
+                if lang not in SUPPORTED_LANGUAGES:
+                    continue
+                texts = [entry.get("disease_name")] + list(entry.get("aliases") or [])
+                definitions = entry.get("definitions") or []
+                texts += [definitions] if isinstance(definitions, str) else list(definitions)
+                samples += [(t, lang) for t in texts if isinstance(t, str) and t.strip()]
+    if per_language:
+        # Evenly spaced subset per language so langdetect finishes in reasonable time
+        by_lang = defaultdict(list)
+        for text, lang in samples:
+            by_lang[lang].append((text, lang))
+        samples = []
+        for items in by_lang.values():
+            step = max(1, len(items) // per_language)
+            samples += items[::step][:per_language]
+    return samples + EXTRA_SAMPLES
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=3, help="timing passes over the corpus")
+    parser.add_argument("--per-language", type=int, default=500,
+                        help="samples per language (0 = the whole corpus, ~200k strings)")
+    args = parser.parse_args()
+
+    samples = load_corpus(args.per_language)
+    detectors = [
+        ("legacy", legacy_detect),
+        ("langdetect", langdetect_detect),
+        ("script", detect_language),
+    ]
+
+    correct = {name: defaultdict(int) for name, _ in detectors}
+    totals = defaultdict(int)
+    for text, lang in samples:
+        totals[lang] += 1
+        for name, fn in detectors:
+            correct[name][lang] += fn(text) == lang
+
+    print(f"{len(samples)} samples\n")
+    print(f"{'lang':>6}{'n':>7}" + "".join(f"{name:>12}" for name, _ in detectors))
+    for lang in sorted(totals):
+        row = "".join(f"{100 * correct[name][lang] / totals[lang]:>11.1f}%" for name, _ in detectors)
+        print(f"{lang:>6}{totals[lang]:>7}{row}")
+    overall = "".join(
+        f"{100 * sum(correct[name].values()) / len(samples):>11.1f}%" for name, _ in detectors
+    )
+    print(f"{'all':>6}{len(samples):>7}{overall}\n")
+
+    print(f"{'detector':>12}{'us/call':>10}")
+    for name, fn in detectors:
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            for text, _ in samples:
+                fn(text)
+        elapsed = time.perf_counter() - start
+        print(f"{name:>12}{1e6 * elapsed / (args.repeat * len(samples)):>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Per-worker memory of the disease and recommendation tables (tracemalloc):
+the parsed JSON lists app.py used to keep as module globals, the previous
+(id, lang) -> JSON dict tables, and the compact records the store holds
+now. Every figure is multiplied by the worker count to show the host-wide
+cost.
+
+Run from the backend directory:
+    python -m benchmarks.bench_memory [--workers 4]
+"""
+import argparse
+import gc
+import json
+import os
+import tracemalloc
+
+from models.knowledge_store import DATA_DIR, DATASETS, KnowledgeStore, build_index
+
+
+def load_json(dataset):
+    disease_file, recommendation_file = DATASETS[dataset]
+    with open(os.path.join(DATA_DIR, disease_file), encoding="utf-8") as f:
+        diseases = json.load(f)
+    with open(os.path.join(DATA_DIR, recommendation_file), encoding="utf-8") as f:
+        recommendations = json.load(f)
+    return diseases, recommendations
+
+
+def parsed_lists(dataset):
+    return load_json(dataset)
+
+
+def dict_tables(dataset):
+    diseases, recommendations = load_json(dataset)
+    return ({(str(e["disease_label"]), e["lang"]): e for e in diseases},
+            {(str(r["disease_id"]), r["lang"]): r for r in recommendations})
+
+
+def records(dataset):
+    state = build_index(*load_json(dataset))
+    return state["diseases"], state["recommendations"]
+
+
+def whole_store(dataset):
+    disease_file, recommendation_file = DATASETS[dataset]
+    return KnowledgeStore(disease_file=disease_file, recommendation_file=recommendation_file, dataset=dataset)
+
+
+def traced(build):
+    """Bytes still allocated by what build() returns, once everything else is freed."""
+    gc.collect()
+    tracemalloc.start()
+    kept = build()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    rows = [
+        ("parsed JSON lists", parsed_lists),
+        ("dict tables (before)", dict_tables),
+        ("records (now)", records),
+        ("whole store (now)", whole_store),
+    ]
+    print(f"{'':>22}" + "".join(f"{d:>10}" for d in DATASETS) + f"{'both':>10}{f'x{args.workers} workers':>16}")
+    for label, build in rows:
+        sizes = [traced(lambda: build(dataset)) for dataset in DATASETS]
+        both = sum(sizes)
+        print(f"{label:>22}" + "".join(f"{s / 1e6:>8.2f}MB" for s in sizes)
+              + f"{both / 1e6:>8.2f}MB{both * args.workers / 1e6:>14.2f}MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+CPU latency: LoRA adapter applied at runtime vs. adapter merged into the base.
+
+Run from the backend directory:
+    python -m benchmarks.bench_merged [--runs 5] [--new-tokens 20]
+
+The first run builds the merged artifact if it is not cached yet.
+"""
+import argparse
+import time
+
+import torch
+
+from models import symptom_model
+
+SAMPLE_SYMPTOMS = (
+    "for several weeks fatigue, weakness, pale skin, mild dizziness, "
+    "headache, brittle nails, cold hands and feet"
+)
+
+
+def time_generation(tokenizer, model, runs, new_tokens):
+    inputs = tokenizer(symptom_model.build_prompt(SAMPLE_SYMPTOMS), return_tensors="pt")
+    timings = []
+    with torch.no_grad():
+        # Warm-up pass so allocator / thread-pool setup is not measured
+        model.generate(**inputs, max_new_tokens=2, do_sample=False,
+                       pad_token_id=tokenizer.eos_token_id)
+        for _ in range(runs):
+            start = time.perf_counter()
+            model.generate(**inputs, max_new_tokens=new_tokens, min_new_tokens=new_tokens,
+                           do_sample=False, pad_token_id=tokenizer.eos_token_id)
+            timings.append(time.perf_counter() - start)
+    timings.sort()
+    median = timings[len(timings) // 2]
+    return median, median / new_tokens
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--new-tokens", type=int, default=20)
+    args = parser.parse_args()
+
+    results = {}
+
+    start = time.perf_counter()
+    tokenizer = symptom_model.AutoTokenizer.from_pretrained(symptom_model.base_model_name)
+    model = symptom_model.load_adapter_model().eval()
+    load_s = time.perf_counter() - start
+    results["adapter"] = (load_s, *time_generation(tokenizer, model, args.runs, args.new_tokens))
+    del model
+
+    symptom_model.build_merged_model()
+    start = time.perf_counter()
+    tokenizer, model = symptom_model.load_merged_model()
+    model.eval()
+    load_s = time.perf_counter() - start
+    results["merged"] = (load_s, *time_generation(tokenizer, model, args.runs, args.new_tokens))
+
+    print(f"{'mode':<10}{'load (s)':>10}{'generate (s)':>14}{'per token (ms)':>16}")
+    for mode, (load_s, total_s, per_token_s) in results.items():
+        print(f"{mode:<10}{load_s:>10.2f}{total_s:>14.3f}{per_token_s * 1000:>16.1f}")
+    speedup = results["adapter"][2] / results["merged"][2]
+    print(f"\nmerged per-token speedup: {speedup:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Parity and speed of the ONNX Runtime backend against eager PyTorch, both
+running the merged model in float32 with greedy decoding.
+
+Parity: every symptom text must get the same disease / urgency IDs from
+both backends, and the next-token logits of each prompt must agree within
+--atol. Exits non-zero on any mismatch, so it doubles as a release check.
+Speed: median latency per call and throughput for single prompts and for
+padded batches.
+
+Run from the backend directory (needs optimum[onnxruntime]; the first run
+builds the merged and ONNX artifacts):
+    python -m benchmarks.bench_onnx [--runs 5] [--batch-size 4]
+"""
+import argparse
+import sys
+import time
+
+import torch
+
+from models import symptom_model
+
+SYMPTOMS = [
+    "for several weeks fatigue, weakness, pale skin, mild dizziness, headache, brittle nails",
+    "high fever, severe joint pain, rash, headache behind the eyes",
+    "frequent urination, excessive thirst, blurred vision, slow healing wounds",
+    "persistent cough for three weeks, night sweats, weight loss, blood in sputum",
+    "watery diarrhea, vomiting, leg cramps, dry mouth",
+    "wheezing, shortness of breath, chest tightness at night",
+    "burning sensation while urinating, lower abdominal pain, cloudy urine",
+    "sneezing, runny nose, itchy eyes after dust exposure",
+]
+
+
+def next_token_logits(tokenizer, model, texts):
+    inputs = tokenizer([symptom_model.build_prompt(t) for t in texts], return_tensors="pt", padding=True)
+    with torch.no_grad():
+        return model(**inputs).logits[:, -1].float()
+
+
+def predict(tokenizer, model, texts):
+    with torch.no_grad():
+        return symptom_model._generate_batch(tokenizer, model, texts, None)
+
+
+def time_calls(tokenizer, model, batches, runs):
+    predict(tokenizer, model, batches[0])  # warm-up: thread pools, allocator, graph init
+    timings = []
+    for _ in range(runs):
+        for batch in batches:
+            start = time.perf_counter()
+            predict(tokenizer, model, batch)
+            timings.append(time.perf_counter() - start)
+    timings.sort()
+    texts = runs * sum(len(b) for b in batches)
+    return timings[len(timings) // 2], texts / sum(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--batch-size", type=int, default=4)
+    parser.add_argument("--atol", type=float, default=1e-3)
+    args = parser.parse_args()
+
+    symptom_model.DECODING = "greedy"  # parity needs deterministic decoding
+
+    backends = {}
+    start = time.perf_counter()
+    tokenizer, model = symptom_model.load_merged_model()
+    backends["torch"] = (tokenizer, model.eval(), time.perf_counter() - start)
+    start = time.perf_counter()
+    tokenizer, model = symptom_model.load_onnx_model()
+    backends["onnx"] = (tokenizer, model, time.perf_counter() - start)
+    for tokenizer, _, _ in backends.values():
+        if tokenizer.pad_token is None:
+            tokenizer.pad_token = tokenizer.eos_token
+        tokenizer.padding_side = "left"
+
+    # ---- Parity ----
+    predictions, logits = {}, {}
+    for name, (tokenizer, model, _) in backends.items():
+        predictions[name] = predict(tokenizer, model, SYMPTOMS)
+        logits[name] = next_token_logits(tokenizer, model, SYMPTOMS)
+
+    max_diff = float((logits["torch"] - logits["onnx"]).abs().max())
+    mismatches = [
+        (text, t, o) for text, t, o in zip(SYMPTOMS, predictions["torch"], predictions["onnx"])
+        if (t["disease_id"], t["urgency_id"]) != (o["disease_id"], o["urgency_id"])
+    ]
+    print(f"parity: {len(SYMPTOMS) - len(mismatches)}/{len(SYMPTOMS)} identical predictions, "
+          f"max next-token logit difference {max_diff:.2e} (atol {args.atol})")
+    for text, t, o in mismatches:
+        print(f"  MISMATCH {text[:50]!r}: torch={t} onnx={o}")
+
+    # ---- Speed ----
+    singles = [[t] for t in SYMPTOMS]
+    batches = [SYMPTOMS[i:i + args.batch_size] for i in range(0, len(SYMPTOMS), args.batch_size)]
+    print(f"\n{'backend':>8}{'load (s)':>10}{'single p50 (s)':>16}{'texts/s':>9}"
+          f"{f'batch={args.batch_size} p50 (s)':>20}{'texts/s':>9}")
+    for name, (tokenizer, model, load_s) in backends.items():
+        single_p50, single_tput = time_calls(tokenizer, model, singles, args.runs)
+        batch_p50, batch_tput = time_calls(tokenizer, model, batches, args.runs)
+        print(f"{name:>8}{load_s:>10.2f}{single_p50:>16.3f}{single_tput:>9.2f}"
+              f"{batch_p50:>20.3f}{batch_tput:>9.2f}")
+
+    if mismatches or max_diff > args.atol:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
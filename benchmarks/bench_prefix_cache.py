@@ -0,0 +1,61 @@
+"""
+Prefill time per request with and without the cached instruction prefix.
+
+Run from the backend directory:
+    python -m benchmarks.bench_prefix_cache [--runs 10]
+"""
+import argparse
+import time
+
+import torch
+
+from models import symptom_model
+
+SYMPTOM_SAMPLES = [
+    "fever",
+    "fever, headache, body pain",
+    "excessive thirst, frequent urination, blurred vision, slow healing wounds",
+    "for several weeks fatigue, weakness, pale skin, mild dizziness, headache, "
+    "brittle nails, cold hands and feet, restless legs, shortness of breath on stairs",
+]
+
+
+def median_seconds(fn, runs):
+    fn()  # warm-up
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return timings[len(timings) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    tokenizer, model = symptom_model.get_model()
+    prefix = symptom_model.PromptPrefixCache(tokenizer, model)
+    print(f"instruction prefix: {len(prefix)} tokens\n")
+    print(f"{'suffix tokens':>14}{'full (ms)':>12}{'cached (ms)':>13}{'saved (ms)':>12}")
+
+    with torch.no_grad():
+        for text in SYMPTOM_SAMPLES:
+            full_ids = tokenizer(symptom_model.build_prompt(text), return_tensors="pt")["input_ids"]
+            suffix_ids = prefix.build_inputs(tokenizer, [text])["input_ids"][:, len(prefix):]
+
+            full = median_seconds(lambda: model(input_ids=full_ids, use_cache=True), args.runs)
+            cached = median_seconds(
+                lambda: model(input_ids=suffix_ids, past_key_values=prefix.expand(1), use_cache=True),
+                args.runs,
+            )
+            print(
+                f"{suffix_ids.shape[1]:>14}{full * 1000:>12.1f}{cached * 1000:>13.1f}"
+                f"{(full - cached) * 1000:>12.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""
+Latency and ranking of the typo-tolerant disease name search on a set of
+misspelt, partial and non-English queries.
+
+Run from the backend directory:
+    python -m benchmarks.bench_search [--runs 200]
+"""
+import argparse
+import time
+
+from models.knowledge_store import KnowledgeStore
+
+QUERIES = ["diabetis", "hypertention", "typhod", "dia", "ty", "pneu",
+           "சக்கரை நோய்", "சர்க்கரை நோ", "डेंगु", "chollera"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=200)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    store = KnowledgeStore()
+    print(f"store + index load: {(time.perf_counter() - start) * 1000:.1f} ms "
+          f"({store.stats()['search_names']} names)\n")
+
+    print(f"{'query':>14}{'us':>9}  top match")
+    for query in QUERIES:
+        store.search(query)
+        start = time.perf_counter()
+        for _ in range(args.runs):
+            results = store.search(query)
+        elapsed = (time.perf_counter() - start) / args.runs
+        top = f"{results[0]['matched']} ({results[0]['score']})" if results else "-"
+        print(f"{query:>14}{elapsed * 1e6:>9.1f}  {top}")
+
+
+if __name__ == "__main__":
+    main()
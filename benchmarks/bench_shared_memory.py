@@ -0,0 +1,56 @@
+"""
+Per-worker memory when N processes each load the symptom model, as a
+gunicorn deployment with N workers would. Reports private (unique) and
+shared RSS plus PSS per worker, read from /proc/self/smaps_rollup.
+
+Run from the backend directory, e.g. comparing the two loading paths:
+    SYMPTOM_MODEL_MODE=merged python -m benchmarks.bench_shared_memory --workers 4
+    SYMPTOM_MODEL_MODE=mmap   python -m benchmarks.bench_shared_memory --workers 4
+"""
+import argparse
+import multiprocessing
+
+
+def worker(index, results, done):
+    from models import symptom_model
+    from models.memstats import memory_breakdown
+
+    symptom_model.get_model()
+    symptom_model.predict_batch(["fever, headache"])  # touch every weight page once
+    results.put((index, memory_breakdown()))
+    done.wait()  # stay alive until every worker has reported, so pages really overlap
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    # The first load may have to build the merged / mmap artifacts; do it
+    # once up front so workers do not race on it.
+    from models import symptom_model
+    if symptom_model.SERVING_MODE in ("merged", "mmap"):
+        symptom_model.build_merged_model()
+    if symptom_model.SERVING_MODE == "mmap":
+        symptom_model.build_mmap_weights(dtype=symptom_model.precision_load_dtype(symptom_model.PRECISION))
+
+    ctx = multiprocessing.get_context("spawn")
+    results, done = ctx.Queue(), ctx.Event()
+    procs = [ctx.Process(target=worker, args=(i, results, done)) for i in range(args.workers)]
+    for p in procs:
+        p.start()
+    reports = sorted(results.get() for _ in procs)
+    done.set()
+    for p in procs:
+        p.join()
+
+    print(f"mode={symptom_model.SERVING_MODE} precision={symptom_model.PRECISION} workers={args.workers}\n")
+    print(f"{'worker':>6}{'RSS (MB)':>10}{'private':>10}{'shared':>10}{'PSS':>10}")
+    for index, mem in reports:
+        print(f"{index:>6}{mem['rss_mb']:>10}{mem['private_mb']:>10}{mem['shared_mb']:>10}{mem['pss_mb']:>10}")
+    total_pss = sum(mem["pss_mb"] for _, mem in reports)
+    print(f"\ntotal PSS (actual host memory used by all workers): {total_pss:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
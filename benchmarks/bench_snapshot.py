@@ -0,0 +1,56 @@
+"""
+Startup time and memory of the knowledge store when parsed from the JSON
+files against loading the compiled snapshot. Each mode runs in a fresh
+interpreter, as a new worker would.
+
+Run from the backend directory:
+    python -m benchmarks.bench_snapshot [--runs 5]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+from models.knowledge_store import KnowledgeStore
+
+CHILD = """
+import json, time
+def rss_kb():
+    with open("/proc/self/status") as f:
+        return next(int(line.split()[1]) for line in f if line.startswith("VmRSS"))
+import models.knowledge_store as ks
+before = rss_kb()
+start = time.perf_counter()
+store = ks.KnowledgeStore(snapshot={snapshot})
+elapsed = time.perf_counter() - start
+print(json.dumps({{"ms": elapsed * 1000, "rss_mb": (rss_kb() - before) / 1024, "from": store.loaded_from}}))
+"""
+
+
+def run(snapshot):
+    out = subprocess.run([sys.executable, "-c", CHILD.format(snapshot=snapshot)],
+                         capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    store = KnowledgeStore()  # makes sure a current snapshot exists
+    print(f"snapshot: {store.snapshot_path} ({os.path.getsize(store.snapshot_path) / 1e6:.1f} MB)")
+    print(f"sources:  {sum(os.path.getsize(p) for p in store.sources) / 1e6:.1f} MB of JSON\n")
+
+    print(f"{'mode':>10}{'load (ms)':>11}{'RSS (MB)':>10}")
+    for label, snapshot in (("json", False), ("snapshot", True)):
+        results = [run(snapshot) for _ in range(args.runs)]
+        assert all(r["from"] == label for r in results), results
+        ms = sorted(r["ms"] for r in results)[len(results) // 2]
+        rss = sorted(r["rss_mb"] for r in results)[len(results) // 2]
+        print(f"{label:>10}{ms:>11.1f}{rss:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Accuracy / memory / latency of the symptom model per inference precision.
+
+Each precision runs in its own subprocess so RSS is not polluted by the
+previously loaded model. Predictions are compared against float32 on a
+fixed symptom corpus (disease_id and urgency_id must both match).
+
+Run from the backend directory:
+    python -m benchmarks.eval_precision [--precisions float32,bfloat16,int8]
+"""
+import argparse
+import json
+import subprocess
+import sys
+import time
+
+SYMPTOM_CORPUS = [
+    "for several weeks fatigue, weakness, pale skin, mild dizziness, headache, brittle nails, cold hands and feet",
+    "excessive thirst, frequent urination, blurred vision, slow healing wounds",
+    "high fever, severe joint pain, rash, headache, pain behind the eyes",
+    "persistent cough for three weeks, night sweats, weight loss, blood in sputum",
+    "watery diarrhea many times a day, vomiting, leg cramps, dry mouth",
+    "wheezing, shortness of breath, chest tightness at night",
+    "yellow eyes, dark urine, loss of appetite, itching",
+    "burning sensation while urinating, frequent urge to urinate, lower abdominal pain",
+    "red itchy eyes with sticky discharge",
+    "high body temperature after working in the sun, confusion, no sweating",
+    "மென்மையான தலைவலி, மயக்கம், வாந்தி, அதிக வியர்வை, பலவீனம்",
+    "तेज बुखार, सिरदर्द, शरीर में दर्द, ठंड लगना",
+    "జ్వరం, దగ్గు, ఛాతీ నొప్పి, శ్వాస ఆడకపోవడం",
+    "ಹೊಟ್ಟೆ ನೋವು, ವಾಂತಿ, ಅತಿಸಾರ",
+    "জ্বর, মাথাব্যথা, শরীরে ব্যথা",
+]
+
+
+def run_worker(precision):
+    """Loads one precision, predicts the corpus and prints a JSON report."""
+    import torch
+    from models import symptom_model
+    from models.memstats import rss_mb
+
+    symptom_model.PRECISION = precision
+    symptom_model.get_model()
+    info = symptom_model.model_info()
+
+    predictions, timings = [], []
+    for text in SYMPTOM_CORPUS:
+        torch.manual_seed(0)
+        start = time.perf_counter()
+        result = symptom_model.predict_multilingual(text)
+        timings.append(time.perf_counter() - start)
+        predictions.append([result["disease_id"], result["urgency_id"]])
+
+    timings.sort()
+    print(json.dumps({
+        "precision": precision,
+        "load_seconds": info.get("load_seconds"),
+        "rss_mb": round(rss_mb(), 1),
+        "median_latency_s": timings[len(timings) // 2],
+        "predictions": predictions,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--precisions", default="float32,bfloat16,int8")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker)
+        return
+
+    reports = []
+    for precision in args.precisions.split(","):
+        out = subprocess.run(
+            [sys.executable, "-m", "benchmarks.eval_precision", "--worker", precision],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        reports.append(json.loads(out.strip().splitlines()[-1]))
+
+    reference = next((r for r in reports if r["precision"] == "float32"), reports[0])
+    print(f"{'precision':<10}{'load (s)':>10}{'RSS (MB)':>10}{'median (s)':>12}{'agreement':>11}")
+    for r in reports:
+        matches = sum(a == b for a, b in zip(r["predictions"], reference["predictions"]))
+        print(
+            f"{r['precision']:<10}{r['load_seconds']:>10}{r['rss_mb']:>10}"
+            f"{r['median_latency_s']:>12.3f}{matches:>6}/{len(SYMPTOM_CORPUS)}"
+        )
+    print(f"\nagreement is measured against {reference['precision']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+"""
+Prebuilds the compiled knowledge store snapshots (see models.knowledge_store),
+e.g. in the image build, so no worker has to parse the JSON on its first
+request.
+
+    python -m models.build_knowledge_snapshot [default plain] [--rebuild]
+"""
+import argparse
+import json
+import os
+
+from models.knowledge_store import DATASETS, FALLBACK_DATASET, KnowledgeStore, dataset_name, snapshot_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the knowledge store snapshot")
+    parser.add_argument("datasets", nargs="*", default=list(DATASETS), help="Default: all of them")
+    parser.add_argument("--rebuild", action="store_true", help="Ignore existing snapshots")
+    args = parser.parse_args()
+    for dataset in args.datasets:
+        disease_file, recommendation_file = DATASETS[dataset_name(dataset)]
+        if args.rebuild:
+            snapshot = snapshot_path(disease_file, recommendation_file)
+            if os.path.exists(snapshot):
+                os.remove(snapshot)
+        store = KnowledgeStore(disease_file=disease_file, recommendation_file=recommendation_file,
+                               dataset=dataset, fallback=FALLBACK_DATASET or None)
+        print(json.dumps(store.stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+import json
+import math
+import os
+import threading
+import unicodedata
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+# -------------------------------------------------------------
+# Local symptom classifier, shadowing the LLM
+# -------------------------------------------------------------
+# Character n-gram TF-IDF vectors of every disease's name, aliases and
+# definition (per language, from data/disease.json and disease1.json),
+# averaged into one centroid per (language, disease). A query is scored
+# against the centroids of its language through an inverted index.
+#
+# The datasets hold no symptom text, and on symptom descriptions the
+# classifier is far from triage quality (benchmarks/bench_cascade.py: 35%
+# top-1, and its confidence does not track accuracy). So it never answers
+# a request: the LLM always answers, and afterwards, on a background thread
+# off the request path, the classifier records how often the answer it
+# would have served at the threshold agrees with the LLM's. Those metrics are what a decision to serve local
+# answers would have to rest on.
+#
+# The datasets carry no urgency either, so the cascade learns it from the
+# LLM: a disease only counts as locally answerable once the LLM has
+# assigned it an urgency often and consistently enough.
+NGRAM_RANGE = (2, 4)
+# Softmax temperature over cosine similarities; lower = peakier confidences
+TEMPERATURE = 0.05
+
+_CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(os.path.dirname(_CURRENT_DIR), "data")
+DATASETS = ("disease.json", "disease1.json")
+
+
+def _normalize(text):
+    return " ".join(unicodedata.normalize("NFKC", text).casefold().split())
+
+
+def char_ngrams(text, ngram_range=NGRAM_RANGE):
+    """Counts of the character n-grams of each word, padded with spaces."""
+    grams = Counter()
+    low, high = ngram_range
+    for word in _normalize(text).replace(",", " ").split():
+        padded = f" {word} "
+        for n in range(low, high + 1):
+            for i in range(len(padded) - n + 1):
+                grams[padded[i:i + n]] += 1
+    return grams
+
+
+def load_documents(data_dir=DATA_DIR, datasets=DATASETS):
+    """(lang, disease_label, text) for every name, alias and definition."""
+    documents = []
+    for name in datasets:
+        path = os.path.join(data_dir, name)
+        if not os.path.exists(path):
+            continue
+        with open(path, encoding="utf-8") as f:
+            for entry in json.load(f):
+                lang, label = entry.get("lang"), entry.get("disease_label")
+                if lang is None or label is None:
+                    continue
+                definitions = entry.get("definitions") or []
+                texts = [entry.get("disease_name")] + list(entry.get("aliases") or [])
+                texts += [definitions] if isinstance(definitions, str) else list(definitions)
+                documents += [(lang, int(label), t) for t in texts if isinstance(t, str) and t.strip()]
+    return documents
+
+
+class CentroidClassifier:
+    """Nearest-centroid classifier over L2-normalised char n-gram TF-IDF vectors."""
+
+    def __init__(self, documents):
+        doc_grams = [(lang, label, char_ngrams(text)) for lang, label, text in documents]
+
+        df = Counter()
+        for _, _, grams in doc_grams:
+            df.update(grams.keys())
+        n_docs = len(doc_grams)
+        self.idf = {g: math.log((1 + n_docs) / (1 + count)) + 1 for g, count in df.items()}
+
+        sums = defaultdict(Counter)
+        for lang, label, grams in doc_grams:
+            for g, w in self._unit(self._tfidf(grams)).items():
+                sums[(lang, label)][g] += w
+
+        # Inverted index per language: n-gram -> [(label, weight)]
+        self.labels = defaultdict(list)
+        self.index = defaultdict(lambda: defaultdict(list))
+        for (lang, label), centroid in sorted(sums.items()):
+            self.labels[lang].append(label)
+            for g, w in self._unit(centroid).items():
+                self.index[lang][g].append((label, w))
+
+    def _tfidf(self, grams):
+        idf = self.idf
+        return {g: (1 + math.log(c)) * idf[g] for g, c in grams.items() if g in idf}
+
+    @staticmethod
+    def _unit(vector):
+        norm = math.sqrt(sum(w * w for w in vector.values()))
+        return {g: w / norm for g, w in vector.items()} if norm else {}
+
+    def scores(self, text, lang):
+        """Cosine similarity of text to every disease centroid of lang (en if lang has none)."""
+        if lang not in self.index:
+            lang = "en"
+        index = self.index[lang]
+        sims = dict.fromkeys(self.labels[lang], 0.0)
+        for g, w in self._unit(self._tfidf(char_ngrams(text))).items():
+            for label, cw in index.get(g, ()):
+                sims[label] += w * cw
+        return sims
+
+    def predict(self, text, lang, top_k=3):
+        """[(label, probability)] of the top_k diseases, softmax over similarities."""
+        sims = self.scores(text, lang)
+        if not sims:
+            return []
+        best = max(sims.values())
+        exp = {label: math.exp((s - best) / TEMPERATURE) for label, s in sims.items()}
+        total = sum(exp.values())
+        ranked = sorted(exp.items(), key=lambda item: item[1], reverse=True)[:top_k]
+        return [(label, e / total) for label, e in ranked]
+
+
+class Cascade:
+    """
+    Decides per request whether the local classifier would have answered,
+    learns urgency from LLM answers and tracks agreement with the LLM.
+    """
+
+    def __init__(self, classifier, threshold=0.6, min_urgency_obs=3, urgency_agreement=0.8):
+        self.classifier = classifier
+        self.threshold = threshold
+        self.min_urgency_obs = min_urgency_obs
+        self.urgency_agreement = urgency_agreement
+        self._lock = threading.Lock()
+        self._urgency = defaultdict(Counter)   # disease_id -> LLM urgency counts
+        self._stats = Counter()
+        self._shadow_pool = ThreadPoolExecutor(1, thread_name_prefix="cascade-shadow")
+
+    def _urgency_for(self, disease_id):
+        counts = self._urgency.get(disease_id)
+        total = sum(counts.values()) if counts else 0
+        if total < self.min_urgency_obs:
+            return None
+        urgency_id, count = counts.most_common(1)[0]
+        share = count / total
+        return (urgency_id, share) if share >= self.urgency_agreement else None
+
+    def classify(self, text, lang):
+        """
+        The answer the classifier would serve {"disease_id", "urgency_id",
+        "confidence", "urgency_confidence", "top_diseases"} when confident,
+        else None. The top guess is returned separately for agreement tracking.
+        """
+        top = self.classifier.predict(text, lang)
+        if not top:
+            return None, None
+        disease_id, confidence = top[0]
+        with self._lock:
+            self._stats["requests"] += 1
+            urgency = self._urgency_for(disease_id) if confidence >= self.threshold else None
+            if urgency is None:
+                if confidence >= self.threshold:
+                    self._stats["unknown_urgency"] += 1
+                return None, disease_id
+            self._stats["confident"] += 1
+        return {
+            "disease_id": disease_id,
+            "urgency_id": urgency[0],
+            "confidence": round(confidence, 4),
+            "urgency_confidence": round(urgency[1], 4),
+            "top_diseases": [(label, round(p, 4)) for label, p in top],
+        }, disease_id
+
+    def observe(self, local, guess, disease_id, urgency_id):
+        """
+        Records an LLM answer: learns its urgency and compares it with the
+        local top guess and, if there was one, the local answer.
+        """
+        with self._lock:
+            self._urgency[disease_id][urgency_id] += 1
+            if guess is not None:
+                self._stats["compared"] += 1
+                self._stats["agreed"] += guess == disease_id
+            if local is not None:
+                self._stats["confident_compared"] += 1
+                self._stats["confident_agreed"] += local["disease_id"] == disease_id
+                self._stats["confident_urgency_agreed"] += local["urgency_id"] == urgency_id
+
+    def shadow(self, text, lang, disease_id, urgency_id):
+        """classify() + observe() for an LLM answer, on a background thread."""
+        def compare():
+            try:
+                local, guess = self.classify(text, lang)
+                self.observe(local, guess, disease_id, urgency_id)
+            except Exception as e:
+                print(f"[WARNING] Cascade shadow comparison failed: {e}")
+
+        self._shadow_pool.submit(compare)
+
+    def metrics(self):
+        with self._lock:
+            stats = dict(self._stats)
+            learned = sum(1 for d in self._urgency if self._urgency_for(d) is not None)
+        requests = stats.get("requests", 0)
+        compared, confident = stats.get("compared", 0), stats.get("confident_compared", 0)
+        return {
+            "mode": "shadow",
+            "threshold": self.threshold,
+            "requests": requests,
+            # Requests the classifier would have answered at the threshold
+            "would_answer_locally": stats.get("confident", 0),
+            "would_answer_rate": round(stats.get("confident", 0) / requests, 4) if requests else 0.0,
+            "confident_unknown_urgency": stats.get("unknown_urgency", 0),
+            # Local top guess vs the LLM on every request
+            "agreement_top1": round(stats.get("agreed", 0) / compared, 4) if compared else None,
+            # Local answer vs the LLM on the requests it would have answered
+            "agreement_would_answer": (
+                round(stats.get("confident_agreed", 0) / confident, 4) if confident else None
+            ),
+            "urgency_agreement_would_answer": (
+                round(stats.get("confident_urgency_agreed", 0) / confident, 4) if confident else None
+            ),
+            "diseases_with_learned_urgency": learned,
+        }
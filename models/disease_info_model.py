@@ -1,26 +1,39 @@
-import json
-import os
+from models.knowledge_store import get_store
 
-_CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
-_BACKEND_DIR = os.path.dirname(_CURRENT_DIR)
-_DATA_DIR = os.path.join(_BACKEND_DIR, "data")
 
-def get_disease_info(disease_name):
-    # Load data
+def _info(entry):
+    return {
+        "name": entry.disease_name,
+        "definition": entry.definitions if entry.definitions is not None else "Definition not available.",
+        "symptoms": list(entry.symptoms),
+        "causes": list(entry.causes)
+    }
+
+
+def get_disease_info(disease_name, dataset=None):
+    # Load data (once per process)
+    try:
+        store = get_store(dataset)
+    except FileNotFoundError:
+        return {"error": "Disease database not found."}
+
+    # Search for disease by name or alias, in any language, tolerating typos
+    _, entry = store.find_disease(disease_name, fuzzy=True)
+    if entry is None:
+        return {"error": "Disease not found."}
+
+    return _info(entry)
+
+
+def get_disease_info_by_id(disease_id, language="en", dataset=None):
     try:
-        with open(os.path.join(_DATA_DIR, "disease.json"), encoding="utf-8") as f:
-            data = json.load(f)
+        store = get_store(dataset)
     except FileNotFoundError:
         return {"error": "Disease database not found."}
 
-    # Search for disease by name
-    for entry in data:
-        if entry.get("disease_name", "").lower() == disease_name.lower():
-            return {
-                "name": entry["disease_name"],
-                "definition": entry.get("definitions", "Definition not available."),
-                "symptoms": entry.get("symptoms", []),
-                "causes": entry.get("causes", [])
-            }
-            
-    return {"error": "Disease not found."}
+    # Entry in the requested language, falling back to English
+    entry = store.disease(disease_id, language)
+    if entry is None:
+        return {"error": "Disease not found."}
+
+    return {"disease_id": entry.disease_id, "lang": entry.lang, **_info(entry)}
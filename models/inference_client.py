@@ -0,0 +1,60 @@
+import json
+import threading
+from multiprocessing.connection import Client
+
+
+class InferenceClient:
+    """
+    Thin client for models.inference_server. Each thread keeps its own
+    connection; a connection that errors or times out is dropped and the
+    next call reconnects.
+    """
+
+    def __init__(self, address, timeout=30.0, authkey=None):
+        self.address = address
+        self.timeout = timeout
+        self.authkey = authkey
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = Client(self.address, family="AF_UNIX", authkey=self.authkey)
+            self._local.conn = conn
+        return conn
+
+    def _drop_connection(self):
+        conn = getattr(self._local, "conn", None)
+        self._local.conn = None
+        if conn is not None:
+            try:
+                conn.close()
+            except OSError:
+                pass
+
+    def call(self, op, timeout=None, **params):
+        timeout = self.timeout if timeout is None else timeout
+        try:
+            conn = self._connection()
+            conn.send_bytes(json.dumps({"op": op, **params}).encode("utf-8"))
+            response = json.loads(conn.recv_bytes()) if conn.poll(timeout) else None
+        except (OSError, EOFError) as e:
+            self._drop_connection()
+            raise ConnectionError(f"Inference server at {self.address} unavailable: {e}") from e
+
+        if response is None:
+            # A late reply would be read by the next call; discard the connection
+            self._drop_connection()
+            raise TimeoutError(f"Inference server did not answer '{op}' within {timeout}s")
+        if not response.get("ok"):
+            raise RuntimeError(f"Inference server error: {response.get('error')}")
+        return response["result"]
+
+    def predict_multilingual(self, text, variant=None):
+        return self.call("predict", text=text, variant=variant)
+
+    def status(self, timeout=None):
+        return self.call("status", timeout=timeout)
+
+    def metrics(self, timeout=None):
+        return self.call("metrics", timeout=timeout)
@@ -0,0 +1,101 @@
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+
+
+class MicroBatcher:
+    """
+    Collects items submitted from many threads and hands them to
+    `run_batch(items) -> results` in groups: a batch closes when `window_ms`
+    has passed since its first item arrived or when it reaches
+    `max_batch_size`, whichever comes first. Each caller gets its own result
+    back through a Future.
+    """
+
+    def __init__(self, run_batch, window_ms=20, max_batch_size=8, name="micro-batcher"):
+        self._run_batch = run_batch
+        self.window = window_ms / 1000.0
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.name = name
+
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._requests = 0
+        self._batch_sizes = Counter()
+
+    def submit(self, item):
+        """Queues one item and returns a Future for its result."""
+        self._ensure_started()
+        future = Future()
+        self._queue.put((item, future))
+        return future
+
+    def predict(self, item, timeout=None):
+        """Blocking helper: submit and wait for the result."""
+        return self.submit(item).result(timeout=timeout)
+
+    def metrics(self):
+        with self._stats_lock:
+            return {
+                "window_ms": round(self.window * 1000, 1),
+                "max_batch_size": self.max_batch_size,
+                "queue_depth": self._queue.qsize(),
+                "requests": self._requests,
+                "batches": self._batches,
+                "avg_batch_size": round(self._requests / self._batches, 2) if self._batches else 0.0,
+                "batch_size_histogram": dict(sorted(self._batch_sizes.items())),
+            }
+
+    # ---------------------------------------------------------
+    # Worker
+    # ---------------------------------------------------------
+    def _ensure_started(self):
+        # Started on first use rather than at import so that pre-forking
+        # servers do not inherit a dead thread from the parent process.
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name=self.name, daemon=True)
+                self._thread.start()
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _loop(self):
+        while True:
+            batch = [(item, fut) for item, fut in self._collect() if fut.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            with self._stats_lock:
+                self._batches += 1
+                self._requests += len(batch)
+                self._batch_sizes[len(batch)] += 1
+
+            try:
+                results = self._run_batch([item for item, _ in batch])
+            except Exception as e:
+                print(f"[BATCHER] {self.name}: batch of {len(batch)} failed: {e}")
+                for _, fut in batch:
+                    fut.set_exception(e)
+                continue
+
+            for (_, fut), result in zip(batch, results):
+                fut.set_result(result)
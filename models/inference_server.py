@@ -0,0 +1,111 @@
+"""
+Standalone symptom-model process. One instance owns the Navarasa weights and
+answers prediction requests from any number of web workers over a Unix
+domain socket; point the web app at it with SYMPTOM_INFERENCE_SOCKET.
+
+    python -m models.inference_server [--socket PATH]
+
+The socket is created with mode 0600, so only processes running as the
+same user can connect; the default path is in a per-user directory
+(mode 0700) under $XDG_RUNTIME_DIR or the temp directory. Set
+SYMPTOM_INFERENCE_AUTHKEY on both sides to also require a shared key.
+
+Messages are length-prefixed JSON (multiprocessing.connection framing, no
+pickle): {"op": "predict" | "status" | "metrics", ...} ->
+{"ok": true, "result": ...} or {"ok": false, "error": "..."}.
+"""
+import argparse
+import json
+import os
+import stat
+import tempfile
+import threading
+from multiprocessing.connection import Listener
+
+from models import symptom_model
+
+DEFAULT_SOCKET = os.path.join(
+    os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir(), f"navarasa-{os.getuid()}", "symptom.sock"
+)
+
+
+def handle_request(request):
+    op = request.get("op")
+    if op == "predict":
+        return symptom_model.predict_multilingual(request["text"], request.get("variant"))
+    if op == "status":
+        return symptom_model.model_status()
+    if op == "metrics":
+        return symptom_model.metrics()
+    raise ValueError(f"Unknown op '{op}'")
+
+
+def serve_connection(conn):
+    # One thread per client connection; concurrent predictions from several
+    # web workers meet in the model's micro-batcher.
+    with conn:
+        while True:
+            try:
+                request = json.loads(conn.recv_bytes())
+            except (EOFError, OSError):
+                return
+            try:
+                response = {"ok": True, "result": handle_request(request)}
+            except Exception as e:
+                response = {"ok": False, "error": str(e)}
+            conn.send_bytes(json.dumps(response, ensure_ascii=False).encode("utf-8"))
+
+
+def private_socket_dir(address):
+    """
+    Creates the socket's directory (mode 0700) if missing. Refuses one that
+    another user owns or that others may write to, where someone else could
+    swap the socket.
+    """
+    directory = os.path.dirname(os.path.abspath(address))
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    info = os.stat(directory)
+    sticky_shared = info.st_mode & stat.S_ISVTX  # e.g. /tmp itself
+    if info.st_uid not in (os.getuid(), 0) or (info.st_mode & 0o022 and not sticky_shared):
+        raise PermissionError(f"Socket directory {directory} is not private to this user")
+    return directory
+
+
+def serve(address, authkey=None):
+    private_socket_dir(address)
+    if os.path.exists(address):
+        os.unlink(address)  # stale socket from a previous run
+
+    # Bound with a restrictive umask (and chmod-ed again) so the socket is
+    # never connectable by other users, not even briefly
+    umask = os.umask(0o177)
+    try:
+        listener = Listener(address, family="AF_UNIX", authkey=authkey)
+    finally:
+        os.umask(umask)
+    os.chmod(address, 0o600)
+    print(f"[INFERENCE_SERVER] Listening on {address}")
+    symptom_model.start_background_warmup()
+    try:
+        while True:
+            try:
+                conn = listener.accept()
+            except Exception as e:  # failed auth handshake etc.
+                print(f"[INFERENCE_SERVER] Rejected connection: {e}")
+                continue
+            threading.Thread(target=serve_connection, args=(conn,), daemon=True).start()
+    finally:
+        listener.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Symptom model inference server")
+    parser.add_argument("--socket", default=os.environ.get("SYMPTOM_INFERENCE_SOCKET") or DEFAULT_SOCKET)
+    args = parser.parse_args()
+
+    authkey = os.environ.get("SYMPTOM_INFERENCE_AUTHKEY")
+    serve(args.socket, authkey.encode("utf-8") if authkey else None)
+
+
+if __name__ == "__main__":
+    main()
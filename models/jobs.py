@@ -0,0 +1,280 @@
+import json
+from abc import ABC, abstractmethod
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+# -------------------------------------------------------------
+# Background jobs for long-running chat requests
+# -------------------------------------------------------------
+# A JobManager runs `run(request) -> result` on a bounded thread pool and
+# keeps each job's status and result in a JobStore: MemoryJobStore for a
+# single process, SQLiteJobStore when several web workers must see the same
+# jobs (any worker can answer a poll or cancel; the one that accepted a job
+# runs it). Finished jobs are dropped `ttl` seconds after they end.
+#
+# status: queued -> running -> succeeded | failed
+#         queued | running -> cancelled   (a running job finishes its work,
+#                                          but the result is discarded)
+FINISHED = ("succeeded", "failed", "cancelled")
+
+
+class QueueFull(RuntimeError):
+    pass
+
+
+class JobStore(ABC):
+    """Keeps job records: dicts with id, status, request, result, error and timestamps."""
+
+    @abstractmethod
+    def create(self, job):
+        """Stores a new job record."""
+
+    @abstractmethod
+    def get(self, job_id):
+        """A copy of the job record, or None."""
+
+    @abstractmethod
+    def transition(self, job_id, from_statuses, **fields):
+        """Applies fields only while the job is in one of from_statuses. Returns True if applied."""
+
+    @abstractmethod
+    def purge_expired(self, now):
+        """Deletes jobs whose expires_at has passed; returns how many."""
+
+    def wait(self, job_id, timeout):
+        """Blocks until the job is finished or timeout passes; returns the job (or None)."""
+        deadline = time.monotonic() + timeout
+        while True:
+            job = self.get(job_id)
+            if job is None or job["status"] in FINISHED or time.monotonic() >= deadline:
+                return job
+            time.sleep(min(0.2, max(0.0, deadline - time.monotonic())))
+
+    @abstractmethod
+    def counts(self):
+        """{status: number of jobs}."""
+
+
+class MemoryJobStore(JobStore):
+    def __init__(self):
+        self._jobs = {}
+        self._changed = threading.Condition()
+
+    def create(self, job):
+        with self._changed:
+            self._jobs[job["id"]] = dict(job)
+
+    def get(self, job_id):
+        with self._changed:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def transition(self, job_id, from_statuses, **fields):
+        with self._changed:
+            job = self._jobs.get(job_id)
+            if job is None or job["status"] not in from_statuses:
+                return False
+            job.update(fields)
+            self._changed.notify_all()
+            return True
+
+    def purge_expired(self, now):
+        with self._changed:
+            expired = [i for i, job in self._jobs.items() if job["expires_at"] <= now]
+            for job_id in expired:
+                del self._jobs[job_id]
+            return len(expired)
+
+    def wait(self, job_id, timeout):
+        # Woken by every transition instead of polling
+        deadline = time.monotonic() + timeout
+        with self._changed:
+            while True:
+                job = self._jobs.get(job_id)
+                remaining = deadline - time.monotonic()
+                if job is None or job["status"] in FINISHED or remaining <= 0:
+                    return dict(job) if job is not None else None
+                self._changed.wait(remaining)
+
+    def counts(self):
+        with self._changed:
+            counts = {}
+            for job in self._jobs.values():
+                counts[job["status"]] = counts.get(job["status"], 0) + 1
+            return counts
+
+
+class SQLiteJobStore(JobStore):
+    """Jobs in a SQLite file shared by every worker process on the host."""
+
+    _COLUMNS = ("id", "status", "request", "result", "error",
+                "created_at", "started_at", "finished_at", "expires_at")
+    _JSON = ("request", "result")
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        with self._conn() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id TEXT PRIMARY KEY, status TEXT, request TEXT, result TEXT, error TEXT,"
+                " created_at REAL, started_at REAL, finished_at REAL, expires_at REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_expires_at ON jobs (expires_at)")
+
+    def _conn(self):
+        # One connection per thread; sqlite3 connections are not shareable by default
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            self._local.conn = conn
+        return conn
+
+    def _encode(self, fields):
+        return {k: json.dumps(v, ensure_ascii=False) if k in self._JSON and v is not None else v
+                for k, v in fields.items()}
+
+    def create(self, job):
+        row = self._encode(job)
+        with self._conn() as conn:
+            conn.execute(
+                f"INSERT INTO jobs ({', '.join(self._COLUMNS)}) VALUES ({', '.join('?' * len(self._COLUMNS))})",
+                [row.get(c) for c in self._COLUMNS],
+            )
+
+    def get(self, job_id):
+        row = self._conn().execute(
+            f"SELECT {', '.join(self._COLUMNS)} FROM jobs WHERE id = ?", (job_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        job = dict(zip(self._COLUMNS, row))
+        for key in self._JSON:
+            if job[key] is not None:
+                job[key] = json.loads(job[key])
+        return job
+
+    def transition(self, job_id, from_statuses, **fields):
+        row = self._encode(fields)
+        assignments = ", ".join(f"{k} = ?" for k in row)
+        with self._conn() as conn:
+            cursor = conn.execute(
+                f"UPDATE jobs SET {assignments} WHERE id = ? AND status IN ({', '.join('?' * len(from_statuses))})",
+                [*row.values(), job_id, *from_statuses],
+            )
+            return cursor.rowcount == 1
+
+    def purge_expired(self, now):
+        with self._conn() as conn:
+            return conn.execute("DELETE FROM jobs WHERE expires_at <= ?", (now,)).rowcount
+
+    def counts(self):
+        return dict(self._conn().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+
+
+class JobManager:
+    """
+    Runs submitted requests on at most `max_workers` threads, with at most
+    `max_pending` jobs of this process queued or running at once (further
+    submissions raise QueueFull).
+    """
+
+    def __init__(self, run, store, max_workers=2, max_pending=64, ttl_seconds=3600, name="jobs"):
+        self._run = run
+        self.store = store
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.ttl = ttl_seconds
+        self.name = name
+        self._executor = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._last_purge = 0.0
+
+    def _pool(self):
+        # Created on first use so pre-forking servers do not inherit dead threads
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix=self.name)
+            return self._executor
+
+    def _purge(self):
+        now = time.time()
+        if now - self._last_purge >= 10:
+            self._last_purge = now
+            self.store.purge_expired(now)
+
+    def submit(self, request):
+        """Queues a request; returns the new job record."""
+        self._purge()
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise QueueFull(f"{self._pending} jobs already queued or running")
+            self._pending += 1
+
+        now = time.time()
+        job = {
+            "id": uuid.uuid4().hex, "status": "queued", "request": request,
+            "result": None, "error": None,
+            "created_at": now, "started_at": None, "finished_at": None,
+            # Unfinished jobs get the same allowance; finishing restarts the clock
+            "expires_at": now + self.ttl,
+        }
+        self.store.create(job)
+        try:
+            self._pool().submit(self._execute, job["id"], request)
+        except Exception:
+            self._release()
+            raise
+        return job
+
+    def _release(self):
+        with self._lock:
+            self._pending -= 1
+
+    def _execute(self, job_id, request):
+        try:
+            # Cancelled (possibly from another worker process) while queued
+            if not self.store.transition(job_id, ("queued",), status="running", started_at=time.time()):
+                return
+            try:
+                result, error, status = self._run(request), None, "succeeded"
+            except Exception as e:
+                result, error, status = None, str(e), "failed"
+            now = time.time()
+            # No-op if the job was cancelled while running
+            self.store.transition(job_id, ("running",), status=status, result=result, error=error,
+                                  finished_at=now, expires_at=now + self.ttl)
+        finally:
+            self._release()
+
+    def get(self, job_id, wait=0.0):
+        """The job record, after waiting up to `wait` seconds for it to finish; None if unknown or expired."""
+        self._purge()
+        job = self.store.wait(job_id, wait) if wait > 0 else self.store.get(job_id)
+        if job is not None and job["expires_at"] <= time.time():
+            return None
+        return job
+
+    def cancel(self, job_id):
+        """Cancels a queued or running job. Returns the job record, or None if unknown."""
+        now = time.time()
+        self.store.transition(job_id, ("queued", "running"), status="cancelled",
+                              finished_at=now, expires_at=now + self.ttl)
+        return self.get(job_id)
+
+    def metrics(self):
+        with self._lock:
+            pending = self._pending
+        return {
+            "workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "pending_in_process": pending,
+            "ttl_seconds": self.ttl,
+            "store": type(self.store).__name__,
+            "jobs_by_status": self.store.counts(),
+        }
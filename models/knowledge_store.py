@@ -0,0 +1,582 @@
+import hashlib
+import json
+import marshal
+import os
+import sys
+import threading
+import time
+import unicodedata
+from typing import NamedTuple, Optional, Tuple
+
+from models.disease_search import DiseaseSearchIndex
+
+# -------------------------------------------------------------
+# Disease / recommendation knowledge store
+# -------------------------------------------------------------
+# Loads a dataset generation (e.g. data/disease.json + recommendation.json)
+# once per process and indexes it for O(1) lookups:
+#   (disease_id, lang) -> disease entry / recommendation, English fallback
+#   name or alias in any language -> disease_id
+# plus a typo-tolerant search index over the same names (disease_search).
+# Disease IDs are handled as strings, as the chat state carries them.
+_CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(os.path.dirname(_CURRENT_DIR), "data")
+
+# Dataset generations, selectable per request (the "dataset" field of
+# /chat). Each is loaded on first use and kept side by side with the others.
+DATASETS = {
+    "default": ("disease.json", "recommendation.json"),
+    "plain": ("disease1.json", "recommendation1.json"),
+}
+DEFAULT_DATASET = os.environ.get("KNOWLEDGE_DEFAULT_DATASET", "default")
+
+# Not every generation covers every label the symptom model predicts
+# ("plain" only has IDs 0-53 of 0-124). Lookups of an ID a dataset lacks
+# are answered from KNOWLEDGE_FALLBACK_DATASET instead ("" = no fallback),
+# loaded on the first such lookup; stats() reports how many IDs that covers.
+FALLBACK_DATASET = os.environ.get("KNOWLEDGE_FALLBACK_DATASET", "default")
+
+# Lowest search score accepted when a lookup falls back to fuzzy matching,
+# and the shortest (normalized) name that may fall back at all: one or two
+# letters prefix-match some disease in nearly every language
+FUZZY_MIN_SCORE = 0.6
+FUZZY_MIN_LENGTH = 3
+
+# Compiled snapshot: the validated, deduplicated and indexed datasets are
+# written next to the backend as plain tuples, dicts and bytes (marshal)
+# and rebuilt into records on load instead of re-parsing the JSON. Each
+# file starts with a SHA-256 over the source files, the snapshot layout and
+# the payload; on any mismatch (stale, damaged or from another version of
+# this code) it is rebuilt from the JSON automatically, before anything in
+# it is deserialized. Prebuild one (e.g. in the image build) with
+#     python -m models.build_knowledge_snapshot
+# Loading runs no code, but marshal is not hardened against crafted input,
+# so the directory must still not be writable by anyone else.
+KNOWLEDGE_SNAPSHOT = os.environ.get("KNOWLEDGE_SNAPSHOT", "1") == "1"
+SNAPSHOT_DIR = os.environ.get(
+    "KNOWLEDGE_SNAPSHOT_DIR", os.path.join(os.path.dirname(_CURRENT_DIR), ".knowledge_cache")
+)
+
+# Hot reload: a background thread polls the data files' mtimes every
+# KNOWLEDGE_WATCH_INTERVAL_S seconds (0 disables it) and on a change builds
+# a new store beside the live one, validates it and swaps it in. Requests
+# already holding the old store finish with it. Each worker process
+# watches for itself; POST /admin/reload triggers a reload by hand.
+KNOWLEDGE_WATCH_INTERVAL_S = float(os.environ.get("KNOWLEDGE_WATCH_INTERVAL_S", "5"))
+
+
+def normalize_name(name):
+    """Lookup key for disease names: NFKC, case-folded, single spaces."""
+    return " ".join(unicodedata.normalize("NFKC", name).casefold().split())
+
+
+def source_checksum(paths):
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+# -------------------------------------------------------------
+# Records
+# -------------------------------------------------------------
+# Entries are held as immutable named tuples rather than the parsed JSON
+# dicts: no per-entry key table, list fields as tuples, and every repeated
+# string or tuple stored once (see StringPool).
+class DiseaseRecord(NamedTuple):
+    disease_id: str
+    lang: str
+    disease_name: str
+    aliases: Tuple[str, ...] = ()
+    definitions: Optional[str] = None
+    symptoms: Tuple[str, ...] = ()
+    causes: Tuple[str, ...] = ()
+
+
+class RecommendationRecord(NamedTuple):
+    do: Tuple[str, ...] = ()
+    dont: Tuple[str, ...] = ()
+    home_remedies: Tuple[str, ...] = ()
+
+
+class StringPool:
+    """
+    Returns one shared copy of each distinct string, and of each distinct
+    tuple built from a JSON list. Short strings (language codes, disease
+    IDs) go through sys.intern, so they are also shared between dataset
+    generations; longer ones are pooled only while one dataset is built,
+    as interning every unique sentence would cost more than it saves.
+    The snapshot keeps both: marshal writes shared objects once and
+    re-interns interned strings on load.
+    """
+
+    def __init__(self):
+        self._values = {}
+
+    def __call__(self, value):
+        if isinstance(value, str):
+            return sys.intern(value) if len(value) <= 16 else self._values.setdefault(value, value)
+        if isinstance(value, (list, tuple)):
+            value = tuple(self(v) for v in value)
+            return self._values.setdefault(value, value) if value else ()
+        return value
+
+
+def _valid_disease(entry):
+    return (isinstance(entry, dict) and isinstance(entry.get("disease_label"), int)
+            and isinstance(entry.get("lang"), str) and isinstance(entry.get("disease_name"), str))
+
+
+def _valid_recommendation(item):
+    rec = item.get("recommendation") if isinstance(item, dict) else None
+    return (isinstance(item.get("disease_id") if isinstance(item, dict) else None, int)
+            and isinstance(item.get("lang"), str) and isinstance(rec, dict))
+
+
+def build_index(diseases, recommendations):
+    """
+    Validates and deduplicates the raw JSON lists and builds every lookup
+    table. Returns the store state (records, name tables, search index);
+    nothing refers to the parsed JSON afterwards.
+    Duplicate (id, lang) entries keep the first one, as the old linear
+    scans did; invalid entries are dropped. Both are counted in "report".
+    """
+    report = {"invalid_diseases": 0, "duplicate_diseases": 0,
+              "invalid_recommendations": 0, "duplicate_recommendations": 0}
+
+    share = StringPool()
+    disease_table = {}
+    for entry in diseases:
+        if not _valid_disease(entry):
+            report["invalid_diseases"] += 1
+            continue
+        key = (share(str(entry["disease_label"])), share(entry["lang"]))
+        if key in disease_table:
+            report["duplicate_diseases"] += 1
+            continue
+        disease_table[key] = DiseaseRecord(
+            key[0], key[1], share(entry["disease_name"]),
+            aliases=share(entry.get("aliases") or ()),
+            definitions=share(entry.get("definitions")),
+            symptoms=share(entry.get("symptoms") or ()),
+            causes=share(entry.get("causes") or ()),
+        )
+
+    recommendation_table = {}
+    for item in recommendations:
+        if not _valid_recommendation(item):
+            report["invalid_recommendations"] += 1
+            continue
+        key = (share(str(item["disease_id"])), share(item["lang"]))
+        if key in recommendation_table:
+            report["duplicate_recommendations"] += 1
+            continue
+        rec = item["recommendation"]
+        recommendation_table[key] = RecommendationRecord(
+            share(rec.get("do") or ()), share(rec.get("dont") or ()), share(rec.get("home_remedies") or ()),
+        )
+
+    # Name index, first match wins: every disease's own name before any
+    # alias, English before other languages. A few aliases are shared
+    # by related diseases ("diabetes"); this keeps them on the disease
+    # that is actually called that.
+    names = {}
+    ordered = sorted(disease_table.items(), key=lambda item: item[0][1] != "en")
+    for key, entry in ordered:
+        if entry.disease_name:
+            names.setdefault(normalize_name(entry.disease_name), key)
+    for key, entry in ordered:
+        for alias in entry.aliases:
+            names.setdefault(normalize_name(alias), key)
+
+    search_names = []
+    for (did, lang), entry in disease_table.items():
+        for name in (entry.disease_name,) + entry.aliases:
+            if name:
+                search_names.append((normalize_name(name), name, did, lang))
+
+    return {
+        "diseases": disease_table,
+        "recommendations": recommendation_table,
+        "names": names,
+        "search_index": DiseaseSearchIndex(search_names),
+        "report": report,
+    }
+
+
+def _snapshot_layout():
+    """
+    Changes whenever the snapshot layout may: with this module, the search
+    index or the interpreter's marshal format. Old snapshots are then
+    rebuilt rather than misread, with no format number to keep in step.
+    """
+    digest = hashlib.sha256(f"{sys.version_info[:2]} marshal {marshal.version}".encode())
+    for path in (__file__, sys.modules[DiseaseSearchIndex.__module__].__file__):
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+SNAPSHOT_LAYOUT = _snapshot_layout()
+
+
+def snapshot_path(disease_file, recommendation_file):
+    return os.path.join(SNAPSHOT_DIR, f"{disease_file}+{recommendation_file}.snapshot")
+
+
+def snapshot_data(state):
+    """The store state as marshal-able plain data; see restore_snapshot()."""
+    return (
+        tuple(tuple(record) for record in state["diseases"].values()),
+        tuple(key + tuple(rec) for key, rec in state["recommendations"].items()),
+        state["names"],
+        state["search_index"].to_data(),
+        state["report"],
+    )
+
+
+def restore_snapshot(data):
+    diseases, recommendations, names, search_index, report = data
+    return {
+        "diseases": {(r[0], r[1]): DiseaseRecord._make(r) for r in diseases},
+        "recommendations": {(r[0], r[1]): RecommendationRecord._make(r[2:]) for r in recommendations},
+        "names": names,
+        "search_index": DiseaseSearchIndex.from_data(search_index),
+        "report": report,
+    }
+
+
+class KnowledgeStore:
+    def __init__(self, data_dir=DATA_DIR, disease_file="disease.json",
+                 recommendation_file="recommendation.json", snapshot=KNOWLEDGE_SNAPSHOT,
+                 dataset=DEFAULT_DATASET, fallback=None):
+        start = time.perf_counter()
+        self.dataset = dataset
+        self.fallback = fallback if fallback != dataset else None
+        self.fallback_error = None
+        self.data_dir = data_dir
+        self.sources = [os.path.join(data_dir, disease_file), os.path.join(data_dir, recommendation_file)]
+        self.snapshot_path = snapshot_path(disease_file, recommendation_file)
+        self.checksum = source_checksum(self.sources)
+
+        state = self._load_snapshot() if snapshot else None
+        self.loaded_from = "snapshot"
+        if state is None:
+            state = self._build()
+            self.loaded_from = "json"
+            if snapshot:
+                self._save_snapshot(state)
+
+        self._diseases = state["diseases"]
+        self._recommendations = state["recommendations"]
+        self._names = state["names"]
+        self.search_index = state["search_index"]
+        self.report = state["report"]
+        self.load_ms = round((time.perf_counter() - start) * 1000, 1)
+
+    def _build(self):
+        with open(self.sources[0], encoding="utf-8") as f:
+            diseases = json.load(f)
+        with open(self.sources[1], encoding="utf-8") as f:
+            recommendations = json.load(f)
+        return build_index(diseases, recommendations)
+
+    def _snapshot_digest(self, payload):
+        digest = hashlib.sha256(f"{SNAPSHOT_LAYOUT}:{self.checksum}:".encode())
+        digest.update(payload)
+        return digest.digest()
+
+    def _load_snapshot(self):
+        try:
+            with open(self.snapshot_path, "rb") as f:
+                digest, payload = f.read(32), f.read()
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            print(f"[WARNING] Unreadable knowledge snapshot {self.snapshot_path}, rebuilding: {e}")
+            return None
+        if digest != self._snapshot_digest(payload):
+            print(f"[INFO] Knowledge snapshot {os.path.basename(self.snapshot_path)} is stale, rebuilding")
+            return None
+        try:
+            return restore_snapshot(marshal.loads(payload))
+        except Exception as e:
+            print(f"[WARNING] Unreadable knowledge snapshot {self.snapshot_path}, rebuilding: {e}")
+            return None
+
+    def _save_snapshot(self, state):
+        # Written to a temp file and renamed, so concurrent workers never read half a snapshot
+        tmp_path = f"{self.snapshot_path}.{os.getpid()}.tmp"
+        try:
+            payload = marshal.dumps(snapshot_data(state))
+            os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                f.write(self._snapshot_digest(payload))
+                f.write(payload)
+            os.replace(tmp_path, self.snapshot_path)
+            print(f"[INFO] Knowledge snapshot written: {self.snapshot_path}")
+        except OSError as e:
+            print(f"[WARNING] Could not write knowledge snapshot: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def fallback_store(self):
+        """
+        The live store of the fallback dataset, loaded by the first lookup
+        that needs it; None without one, or if it cannot be loaded (then
+        this store serves what it has, and a reload tries again).
+        """
+        if not self.fallback or self.fallback_error:
+            return None
+        try:
+            return get_store(self.fallback)
+        except (OSError, ValueError) as e:
+            self.fallback_error = str(e)
+            print(f"[WARNING] Fallback dataset '{self.fallback}' of '{self.dataset}' unavailable: {e}")
+            return None
+
+    def disease(self, disease_id, lang="en"):
+        """DiseaseRecord in lang, else English, else the fallback dataset's, else None."""
+        did = str(disease_id)
+        entry = self._diseases.get((did, lang)) or self._diseases.get((did, "en"))
+        if entry is None:
+            fallback = self.fallback_store()
+            entry = fallback.disease(did, lang) if fallback else None
+        return entry
+
+    def recommendation(self, disease_id, lang="en"):
+        """RecommendationRecord (do, dont, home_remedies) in lang, else English, else the fallback dataset's."""
+        did = str(disease_id)
+        rec = self._recommendations.get((did, lang)) or self._recommendations.get((did, "en"))
+        if rec is None:
+            fallback = self.fallback_store()
+            rec = fallback.recommendation(did, lang) if fallback else None
+        return rec
+
+    def _match(self, name, fuzzy):
+        if not name:
+            return None
+        key = normalize_name(name)
+        match = self._names.get(key)
+        if match is None and fuzzy and len(key) >= FUZZY_MIN_LENGTH:
+            candidates = self.search_index.search(key, limit=1, min_score=FUZZY_MIN_SCORE)
+            if candidates:
+                _, _, did, lang = candidates[0]
+                match = (did, lang)
+        return match
+
+    def find_id(self, name, fuzzy=False):
+        """
+        Disease ID for a name or alias in any language, or None. With
+        fuzzy=True a misspelt name falls back to the best search match.
+        """
+        match = self._match(name, fuzzy)
+        return match[0] if match else None
+
+    def find_disease(self, name, fuzzy=False):
+        """(disease_id, DiseaseRecord) for a name or alias, in the language the name is written in."""
+        match = self._match(name, fuzzy)
+        if match is None:
+            return None, None
+        return match[0], self._diseases[match]
+
+    def search(self, query, lang=None, limit=10):
+        """
+        Ranked candidates for a (partial, possibly misspelt) name:
+        [{"disease_id", "name", "matched", "lang", "score"}], with "name"
+        in lang when given (else in the language that matched).
+        """
+        results = []
+        for score, matched, did, matched_lang in self.search_index.search(normalize_name(query), limit):
+            # Not every disease has an entry in lang (or English): then the matched language's
+            entry = self.disease(did, lang or matched_lang) or self.disease(did, matched_lang)
+            results.append({
+                "disease_id": did,
+                "name": entry.disease_name,
+                "matched": matched,
+                "lang": matched_lang,
+                "score": score,
+            })
+        return results
+
+    def disease_ids(self):
+        return sorted({did for did, _ in self._diseases}, key=int)
+
+    @property
+    def version(self):
+        """
+        Dataset version: the start of the source checksum, plus the fallback
+        dataset's version once that is loaded, so caches keyed on it also
+        see that reloading. Never loads the fallback itself.
+        """
+        fallback = _stores.get(self.fallback) if self.fallback else None
+        if fallback is not None:
+            return f"{self.checksum[:12]}+{fallback.version}"
+        return self.checksum[:12]
+
+    def coverage(self):
+        """IDs of the fallback dataset this one lacks, i.e. served from the fallback."""
+        fallback = self.fallback_store()
+        if fallback is None:
+            return {"fallback_dataset": self.fallback, "fallback_ids": 0, "fallback_error": self.fallback_error}
+        missing = set(fallback.disease_ids()) - set(self.disease_ids())
+        return {"fallback_dataset": self.fallback, "fallback_ids": len(missing), "fallback_error": None}
+
+    def validate(self, previous=None):
+        """
+        (errors, warnings) for this store. Errors block a reload: empty
+        tables, or fewer than half the diseases of the store it replaces
+        (usually a truncated file). Gaps the fallbacks cover are warnings.
+        """
+        errors, warnings = [], []
+        ids = set(self.disease_ids())
+        if not ids:
+            errors.append("no valid disease entries")
+        if not self._recommendations:
+            errors.append("no valid recommendation entries")
+        if previous is not None and len(ids) < len(previous.disease_ids()) / 2:
+            errors.append(f"disease count fell from {len(previous.disease_ids())} to {len(ids)}")
+
+        english = {did for did, lang in self._diseases if lang == "en"}
+        recommended = {did for did, _ in self._recommendations}
+        for label, missing in (("diseases without an English entry", ids - english),
+                               ("diseases without recommendations", ids - recommended),
+                               ("recommendations for unknown diseases", recommended - ids)):
+            if missing:
+                warnings.append(f"{label}: {', '.join(sorted(missing, key=int))}")
+        for key, count in self.report.items():
+            if count:
+                warnings.append(f"{key.replace('_', ' ')}: {count}")
+        return errors, warnings
+
+    def stats(self):
+        coverage = self.coverage()  # first: loading the fallback extends the version
+        return {
+            "dataset": self.dataset,
+            "diseases": len(self.disease_ids()),
+            "disease_entries": len(self._diseases),
+            "recommendation_entries": len(self._recommendations),
+            "names": len(self._names),
+            "search_names": len(self.search_index),
+            "version": self.version,
+            "loaded_from": self.loaded_from,
+            "load_ms": self.load_ms,
+            **coverage,
+            **self.report,
+        }
+
+
+_stores = {}
+_store_lock = threading.Lock()
+_reload_lock = threading.Lock()
+_last_reload = {}
+_watcher = None
+
+
+def dataset_name(dataset=None):
+    """The dataset a request selects: DEFAULT_DATASET when empty; ValueError if unknown."""
+    dataset = dataset or DEFAULT_DATASET
+    if dataset not in DATASETS:
+        raise ValueError(f"Unknown dataset '{dataset}', expected one of: {', '.join(DATASETS)}")
+    return dataset
+
+
+def get_store(dataset=None):
+    """The process-wide KnowledgeStore of a dataset generation, loaded on first use."""
+    dataset = dataset_name(dataset)
+    store = _stores.get(dataset)
+    if store is None:
+        with _store_lock:
+            store = _stores.get(dataset)
+            if store is None:
+                disease_file, recommendation_file = DATASETS[dataset]
+                store = KnowledgeStore(disease_file=disease_file, recommendation_file=recommendation_file,
+                                       dataset=dataset, fallback=FALLBACK_DATASET or None)
+                _stores[dataset] = store
+                print(f"[INFO] Knowledge store '{dataset}' loaded from {store.loaded_from} "
+                      f"in {store.load_ms} ms (version {store.version})")
+                _start_watcher()
+    return store
+
+
+def reload_store(dataset=None):
+    """
+    Rebuilds a dataset's store from its data files and swaps it in if it
+    validates; the live store keeps serving throughout and stays if anything
+    fails. Returns a report: reloaded, version, previous_version, errors,
+    warnings.
+    """
+    previous = get_store(dataset)
+    with _reload_lock:
+        report = {"reloaded": False, "version": previous.version, "previous_version": previous.version,
+                  "errors": [], "warnings": [], "at": time.time()}
+        try:
+            candidate = KnowledgeStore(previous.data_dir, *[os.path.basename(p) for p in previous.sources],
+                                       dataset=previous.dataset, fallback=previous.fallback)
+        except Exception as e:
+            report["errors"].append(f"load failed: {e}")
+            candidate = None
+
+        if candidate is not None and candidate.checksum == previous.checksum:
+            report["warnings"].append("data unchanged")
+        elif candidate is not None:
+            report["errors"], report["warnings"] = candidate.validate(previous)
+            if not report["errors"]:
+                # A single reference assignment: readers see the old or the new store, never a mix
+                _stores[previous.dataset] = candidate
+                report["reloaded"] = True
+                report["version"] = candidate.version
+
+        label = f"Knowledge store '{previous.dataset}'"
+        if report["reloaded"]:
+            print(f"[INFO] {label} reloaded: {previous.version} -> {report['version']}")
+        elif report["errors"]:
+            print(f"[ERROR] {label} reload rejected, keeping {previous.version}: {report['errors']}")
+        _last_reload[previous.dataset] = report
+        return report
+
+
+def reload_all():
+    """reload_store() for every dataset loaded so far: {dataset: report}."""
+    return {dataset: reload_store(dataset) for dataset in list(_stores)}
+
+
+def _source_mtimes(paths):
+    return tuple(os.stat(p).st_mtime_ns for p in paths)
+
+
+def _watch(interval):
+    seen = {}
+    while True:
+        for dataset, store in list(_stores.items()):
+            try:
+                current = _source_mtimes(store.sources)
+            except OSError:
+                continue  # a file is briefly missing while an editor replaces it
+            if seen.setdefault(dataset, current) != current:
+                seen[dataset] = current
+                try:
+                    reload_store(dataset)
+                except Exception as e:
+                    print(f"[ERROR] Knowledge store '{dataset}' reload failed: {e}")
+        time.sleep(interval)
+
+
+def _start_watcher():
+    global _watcher
+    if KNOWLEDGE_WATCH_INTERVAL_S > 0 and _watcher is None:
+        _watcher = threading.Thread(target=_watch, args=(KNOWLEDGE_WATCH_INTERVAL_S,),
+                                    name="knowledge-watcher", daemon=True)
+        _watcher.start()
+
+
+def knowledge_metrics():
+    get_store()
+    return {
+        "default_dataset": DEFAULT_DATASET,
+        "watch_interval_s": KNOWLEDGE_WATCH_INTERVAL_S,
+        "datasets": {dataset: {**store.stats(), "last_reload": _last_reload.get(dataset)}
+                     for dataset, store in list(_stores.items())},
+    }
+
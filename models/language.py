@@ -0,0 +1,154 @@
+# -------------------------------------------------------------
+# Script-based language detection (10 supported languages)
+# -------------------------------------------------------------
+# A precomputed codepoint -> script table lets one pass over the text count
+# letters per script; the majority script decides the language. Scripts
+# shared by two languages (Devanagari: hi/mr, Bengali: bn/as) are split by
+# marker letters and frequent function words. langdetect is only consulted
+# for Latin text, and only when the caller wants unsupported languages
+# reported (so they can be translated).
+
+SUPPORTED_LANGUAGES = {'ta', 'mr', 'hi', 'te', 'ml', 'kn', 'gu', 'as', 'bn', 'en'}
+
+# Script classes
+_NONE, _LATIN, _OTHER = 0, 1, 2
+_DEVANAGARI, _BENGALI, _GUJARATI, _TAMIL, _TELUGU, _KANNADA, _MALAYALAM = 3, 4, 5, 6, 7, 8, 9
+_GURMUKHI, _ORIYA = 10, 11
+# Marker letters, counted separately and folded into their script afterwards
+_DEVA_MR_MARKER = 12   # ळ ॅ ॲ (Marathi; absent from standard Hindi)
+_BENG_BN_MARKER = 13   # র (Bengali ra; Assamese writes ৰ)
+_BENG_AS_MARKER = 14   # ৰ ৱ (Assamese ra / wa)
+_NUM_CLASSES = 15
+
+_SCRIPT_LANG = {
+    _TAMIL: "ta", _TELUGU: "te", _KANNADA: "kn", _MALAYALAM: "ml", _GUJARATI: "gu",
+    _GURMUKHI: "pa", _ORIYA: "or",
+}
+
+_TABLE_SIZE = 0x0E00
+
+
+def _build_table():
+    table = bytearray(_TABLE_SIZE)
+    ranges = [
+        (0x0041, 0x005A, _LATIN), (0x0061, 0x007A, _LATIN), (0x00C0, 0x024F, _LATIN),
+        (0x0370, 0x08FF, _OTHER),  # Greek, Cyrillic, Hebrew, Arabic, ...
+        (0x0900, 0x097F, _DEVANAGARI), (0x0980, 0x09FF, _BENGALI),
+        (0x0A00, 0x0A7F, _GURMUKHI), (0x0A80, 0x0AFF, _GUJARATI),
+        (0x0B00, 0x0B7F, _ORIYA), (0x0B80, 0x0BFF, _TAMIL),
+        (0x0C00, 0x0C7F, _TELUGU), (0x0C80, 0x0CFF, _KANNADA),
+        (0x0D00, 0x0D7F, _MALAYALAM), (0x0D80, 0x0DFF, _OTHER),
+    ]
+    for start, end, script in ranges:
+        table[start:end + 1] = bytes([script]) * (end - start + 1)
+    # Danda punctuation is shared by all Indic scripts
+    table[0x0964] = table[0x0965] = _NONE
+    table[0x0933] = table[0x0945] = table[0x0972] = _DEVA_MR_MARKER
+    table[0x09B0] = _BENG_BN_MARKER
+    table[0x09F0] = table[0x09F1] = _BENG_AS_MARKER
+    return bytes(table)
+
+
+_SCRIPT_TABLE = _build_table()
+
+# Frequent function words that tell the Devanagari languages apart
+_MARATHI_WORDS = {"आहे", "आहेत", "आणि", "नाही", "मला", "खूप", "होते", "होत", "किंवा",
+                  "म्हणजे", "यामुळे", "झाला", "झाली", "दुखत", "दुखणे", "आजार"}
+_HINDI_WORDS = {"है", "हैं", "में", "और", "का", "की", "के", "से", "को", "नहीं", "मुझे",
+                "बहुत", "हो", "रहा", "रही", "यह", "दर्द"}
+# Case endings: Marathi genitive/verbal-noun forms vs the Hindi oblique plural
+_MARATHI_SUFFIXES = ("चा", "ची", "चे", "च्या", "णे", "णारा", "णारी", "णारे", "ांना", "ण्याची")
+_HINDI_SUFFIXES = ("ों", "ियों", "ाओं")
+
+# Romanized Hindi / Tamil / Telugu symptom vocabulary. Such text goes to the
+# model as-is (it handles romanized input) instead of being "detected" as
+# Indonesian or Somali and sent to the translator.
+_ROMANIZED_INDIC_WORDS = {
+    "bukhar", "bukhaar", "dard", "sardard", "khansi", "khaansi", "ulti", "dast",
+    "kamzori", "chakkar", "pet", "jukam", "zukam", "thakan", "hai", "mujhe", "bahut",
+    "kaichal", "thalaivali", "vayiru", "vali", "irumal", "jwaram", "jwara", "noppi",
+    "daggu", "vanthi", "tala", "kadupu",
+}
+
+# Latin text shorter than this is too little evidence for langdetect
+_MIN_LATIN_FOR_LANGDETECT = 12
+
+
+def script_counts(text):
+    """Letter counts per script class in a single pass over the text."""
+    counts = [0] * _NUM_CLASSES
+    table, size = _SCRIPT_TABLE, _TABLE_SIZE
+    for code in map(ord, text):
+        if code < size:
+            counts[table[code]] += 1
+        elif code > 0x2FFF:
+            counts[_OTHER] += 1   # CJK and beyond
+    return counts
+
+
+def _devanagari_language(text, marker_count):
+    words = set(text.replace("।", " ").replace(".", " ").split())
+    marathi = len(words & _MARATHI_WORDS) + (2 if marker_count else 0)
+    hindi = len(words & _HINDI_WORDS)
+    for word in words:
+        if word.endswith(_MARATHI_SUFFIXES):
+            marathi += 1
+        elif word.endswith(_HINDI_SUFFIXES):
+            hindi += 1
+    return "mr" if marathi > hindi else "hi"
+
+
+def _latin_language(text, allow_unsupported):
+    words = set(text.lower().replace(",", " ").split())
+    if words & _ROMANIZED_INDIC_WORDS or not allow_unsupported:
+        return "en"
+    # A single word (often a disease name such as "Tuberculosis") is too
+    # little evidence; langdetect readily calls it Spanish or Italian
+    if len(words) < 2 or sum(ch.isalpha() for ch in text) < _MIN_LATIN_FOR_LANGDETECT:
+        return "en"
+    try:
+        from langdetect import DetectorFactory, detect, LangDetectException
+    except ImportError:
+        return "en"
+    DetectorFactory.seed = 0  # deterministic results
+    try:
+        return detect(text)
+    except LangDetectException:
+        return "en"
+
+
+def detect_language(text, allow_unsupported=False):
+    """
+    Detects the language of the input text from the majority script.
+    Supports: ta, mr, hi, te, ml, kn, gu, as, bn, en.
+
+    With allow_unsupported=True other languages are reported too (Latin
+    text via langdetect, other scripts as their code or "und") so callers
+    can translate them; otherwise anything unsupported maps to "en".
+    """
+    if not text or not isinstance(text, str):
+        return "en"
+
+    counts = script_counts(text)
+    counts[_DEVANAGARI] += counts[_DEVA_MR_MARKER]
+    counts[_BENGALI] += counts[_BENG_BN_MARKER] + counts[_BENG_AS_MARKER]
+
+    indic = max(range(_DEVANAGARI, _ORIYA + 1), key=counts.__getitem__)
+    letters = counts[_LATIN] + counts[_OTHER] + sum(counts[_DEVANAGARI:_ORIYA + 1])
+    if not letters:
+        return "en"
+
+    # Mixed input ("fever காய்ச்சல்"): an Indic script wins once it makes up
+    # a quarter of the letters, since Latin is often used for loan words.
+    if counts[indic] and counts[indic] * 4 >= letters:
+        if indic == _DEVANAGARI:
+            return _devanagari_language(text, counts[_DEVA_MR_MARKER])
+        if indic == _BENGALI:
+            as_marks, bn_marks = counts[_BENG_AS_MARKER], counts[_BENG_BN_MARKER]
+            return "as" if as_marks and as_marks >= bn_marks else "bn"
+        lang = _SCRIPT_LANG[indic]
+        return lang if lang in SUPPORTED_LANGUAGES or allow_unsupported else "en"
+
+    if counts[_OTHER] > counts[_LATIN]:
+        return "und" if allow_unsupported else "en"
+    return _latin_language(text, allow_unsupported)
@@ -0,0 +1,120 @@
+import os
+import random
+import threading
+from collections import Counter
+
+
+def parse_variants(spec, base_dir):
+    """
+    Parses "name=path:weight,name2=path2:weight2" into an ordered
+    {name: (absolute_path, weight)} dict. Paths are relative to base_dir;
+    the weight defaults to 1. The first entry is the default variant.
+    """
+    variants = {}
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        name, _, rest = item.partition("=")
+        path, _, weight = rest.partition(":")
+        if not name.strip() or not path.strip():
+            raise ValueError(f"Invalid model variant spec '{item}', expected name=path[:weight]")
+        variants[name.strip()] = (os.path.join(base_dir, path.strip()), float(weight or 1))
+    if not variants:
+        raise ValueError("At least one model variant must be configured")
+    return variants
+
+
+def choose_variant(variants):
+    """Weighted random pick used when a request does not name a variant."""
+    names = list(variants)
+    return random.choices(names, weights=[variants[n][1] for n in names])[0]
+
+
+class AdapterGate:
+    """
+    Serializes adapter switches on a shared model. Any number of requests
+    may run concurrently on the active adapter; a request for another
+    adapter waits until the in-flight ones finish, then switches.
+
+    Once a request for another adapter is waiting, new requests for the
+    active one queue too instead of joining, so a steady stream on one
+    adapter cannot starve the others. Requests that were waiting for an
+    adapter all join when it is switched in (one switch per queued group).
+    """
+
+    def __init__(self, switch):
+        self._switch = switch
+        self._cond = threading.Condition()
+        self._active = None
+        self._in_flight = 0
+        self._phase = 0            # incremented on every switch
+        self._waiting = Counter()  # adapter -> queued requests
+
+    def _others_waiting(self, name):
+        return any(count for n, count in self._waiting.items() if n != name)
+
+    def _may_enter(self, name, since=None):
+        if since is not None and self._active == name and self._phase > since:
+            return True  # our adapter was switched in while we waited
+        if self._active == name:
+            return not self._others_waiting(name) and (since is None or not self._in_flight)
+        return not self._in_flight and (since is not None or not self._others_waiting(name))
+
+    def acquire(self, name):
+        with self._cond:
+            if not self._may_enter(name):
+                since = self._phase
+                self._waiting[name] += 1
+                try:
+                    while not self._may_enter(name, since):
+                        self._cond.wait()
+                finally:
+                    self._waiting[name] -= 1
+            if self._active != name:
+                self._switch(name)
+                self._active = name
+                self._phase += 1
+                self._cond.notify_all()
+            self._in_flight += 1
+
+    def release(self):
+        with self._cond:
+            self._in_flight -= 1
+            if not self._in_flight:
+                self._cond.notify_all()
+
+
+class VariantStats:
+    """Per-variant request count, latency and predicted label distribution."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def record(self, name, latency_s, disease_id, urgency_id):
+        with self._lock:
+            stats = self._stats.setdefault(name, {
+                "requests": 0, "total_latency_s": 0.0,
+                "diseases": Counter(), "urgency": Counter(),
+            })
+            stats["requests"] += 1
+            stats["total_latency_s"] += latency_s
+            stats["diseases"][disease_id] += 1
+            stats["urgency"][urgency_id] += 1
+
+    def snapshot(self, variants):
+        with self._lock:
+            report = {}
+            for name, (path, weight) in variants.items():
+                stats = self._stats.get(name, {})
+                requests = stats.get("requests", 0)
+                report[name] = {
+                    "path": path,
+                    "weight": weight,
+                    "requests": requests,
+                    "avg_latency_ms": round(stats["total_latency_s"] / requests * 1000, 1) if requests else 0.0,
+                    "diseases": dict(stats.get("diseases", Counter()).most_common()),
+                    "urgency": dict(sorted(stats.get("urgency", Counter()).items())),
+                }
+            return report
@@ -319,11 +319,12 @@ def infer_diseases(labs):
 # =====================================================
 # BRIDGE FUNCTION FOR APP.PY
 # =====================================================
-def predict_ocr(message: str):
+def predict_ocr(message: str, on_text=None):
     """
     Main entry point for app.py to call.
     Accepts an image path, URL, or Base64 Data URI.
     Returns a dict with 'text' and 'analysis'.
+    on_text, if given, receives the extracted text as soon as OCR returns.
     """
     try:
         input_str = message.strip()
@@ -393,6 +394,8 @@ def predict_ocr(message: str):
         # 4. Perform OCR & Analysis
         print(f"[OCR] Processing image: {image_path}")
         extracted_text = kolosal_ocr(image_path)
+        if on_text is not None:
+            on_text(extracted_text)
         labs = normalize(extracted_text)
         diagnoses = infer_diseases(labs)
         
@@ -0,0 +1,111 @@
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+# Separators between symptom phrases. "." and "/" only count when not
+# between two digits, so "38.5" or "140/90" stay one number
+_DELIMITERS = re.compile(r"(?:[,;&+|\n\r।॥]|(?<!\d)[./]|[./](?!\d))+")
+
+# Stand-alone conjunction words in the supported languages
+_CONJUNCTIONS = {
+    "and", "with", "plus", "also",
+    "और", "तथा", "एवं", "व",          # hi / mr
+    "आणि",                            # mr
+    "மற்றும்",                         # ta
+    "మరియు",                          # te
+    "ಮತ್ತು",                           # kn
+    "കൂടാതെ", "പിന്നെ",                 # ml
+    "અને",                            # gu
+    "এবং", "ও", "আৰু",                # bn / as
+}
+
+# Zero-width (non-)joiners change the rendering of Indic text, not its meaning
+_INVISIBLE = dict.fromkeys(map(ord, "\u200b\u200c\u200d\ufeff"))
+
+
+def canonicalize(text):
+    """
+    Order- and case-insensitive key for a symptom description:
+    "Headache and FEVER, body pain" -> "body pain|fever|headache".
+    """
+    text = unicodedata.normalize("NFKC", text).translate(_INVISIBLE).casefold()
+    phrases = set()
+    for chunk in _DELIMITERS.split(text):
+        words = []
+        for word in chunk.split():
+            if word in _CONJUNCTIONS:
+                if words:
+                    phrases.add(" ".join(words))
+                words = []
+            else:
+                words.append(word)
+        if words:
+            phrases.add(" ".join(words))
+    return "|".join(sorted(phrases))
+
+
+class PredictionCache:
+    """Thread-safe LRU cache with a per-entry time-to-live."""
+
+    def __init__(self, maxsize=1024, ttl_seconds=3600):
+        self.maxsize = maxsize
+        self.ttl = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.bypassed = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def record_bypass(self):
+        """Counts a lookup that skipped the cache (e.g. non-deterministic decoding)."""
+        with self._lock:
+            self.bypassed += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def metrics(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "bypassed": self.bypassed,
+            }
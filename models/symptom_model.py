@@ -1,6 +1,18 @@
-from transformers import AutoTokenizer, AutoModelForCausalLM
-from peft import PeftModel
+from transformers import (
+    AutoConfig, AutoTokenizer, AutoModelForCausalLM, StoppingCriteria, StoppingCriteriaList, TextStreamer
+)
 import torch
+import copy
+import hashlib
+import re
+import threading
+import time
+
+from models.cascade import Cascade, CentroidClassifier, load_documents
+from models.inference_queue import MicroBatcher
+from models.memstats import memory_breakdown, rss_mb
+from models.model_variants import AdapterGate, VariantStats, choose_variant, parse_variants
+from models.prediction_cache import PredictionCache, canonicalize
 
 # -------------------------------------------------------------
 import os
@@ -13,69 +25,422 @@ backend_dir = os.path.dirname(current_dir)
 model_path = os.path.join(backend_dir, "navarasa-symptom-checker-final")
 
 base_model_name = "Telugu-LLM-Labs/Indic-gemma-2b-finetuned-sft-Navarasa-2.0"
+
+# Serving mode:
+#   "adapter" - base model + LoRA adapter applied at runtime through peft
+#   "merged"  - adapter folded into the base weights once, cached on disk as
+#               safetensors and loaded directly on later starts (no peft)
+#   "mmap"    - merged weights stored as a torch file and memory-mapped
+#               read-only, so every worker process on the host shares the
+#               same physical pages instead of holding its own copy
+SERVING_MODE = os.environ.get("SYMPTOM_MODEL_MODE", "adapter")
+MERGED_CACHE_DIR = os.environ.get(
+    "SYMPTOM_MODEL_CACHE", os.path.join(backend_dir, ".model_cache")
+)
+
+# Inference backend:
+#   "torch" - eager PyTorch (any serving mode / precision above)
+#   "onnx"  - merged model exported once to ONNX (cached next to the merged
+#             artifact) and run by ONNX Runtime's CPU execution provider,
+#             with KV cache. Needs optimum[onnxruntime]; float32 only.
+INFERENCE_BACKEND = os.environ.get("SYMPTOM_MODEL_BACKEND", "torch")
+ONNX_THREADS = int(os.environ.get("SYMPTOM_ONNX_THREADS", "0"))  # 0 = ONNX Runtime default
+
+# Inference precision:
+#   "float32"  - reference weights
+#   "bfloat16" - half the memory of float32, native bf16 matmuls on newer CPUs
+#   "int8"     - dynamic quantization of every nn.Linear (weights int8,
+#                activations quantized on the fly)
+PRECISION = os.environ.get("SYMPTOM_MODEL_PRECISION", "float32")
+PRECISIONS = ("float32", "bfloat16", "int8")
+
+# Named LoRA adapters served on one shared base model, as
+# "name=path:weight,..." (paths relative to the backend directory). Requests
+# pick one by name or are split by weight; the first is the default and the
+# only one used in merged mode.
+MODEL_VARIANTS = parse_variants(
+    os.environ.get("SYMPTOM_MODEL_VARIANTS", f"final={os.path.relpath(model_path, backend_dir)}:1"),
+    backend_dir,
+)
+DEFAULT_VARIANT = next(iter(MODEL_VARIANTS))
+
+
+def served_variants():
+    """
+    The variants this process actually runs: every configured adapter in
+    adapter mode, only the default one in merged / mmap mode and with the
+    onnx backend (the weights there have a single adapter folded in).
+    """
+    if INFERENCE_BACKEND == "onnx" or SERVING_MODE in ("merged", "mmap"):
+        return {DEFAULT_VARIANT: MODEL_VARIANTS[DEFAULT_VARIANT]}
+    return MODEL_VARIANTS
+
 # Global variables for lazy loading
 _tokenizer = None
 _model = None
+_prefix_caches = {}   # variant -> PromptPrefixCache (the prefix KV depends on the adapter)
+_adapter_gate = None
+_load_info = {}
 
-def get_model():
-    global _tokenizer, _model
 
-    if _model is None:
-        print("[INFO] Loading Navarasa model (lazy)...")
+def adapter_fingerprint(path=None):
+    """Short hash of the base model name and the adapter's config/weight files."""
+    path = path or model_path
+    digest = hashlib.sha256(base_model_name.encode("utf-8"))
+    for name in sorted(os.listdir(path)):
+        if not name.startswith("adapter_"):
+            continue
+        digest.update(name.encode("utf-8"))
+        with open(os.path.join(path, name), "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+    return digest.hexdigest()[:16]
 
-        try:
-            _tokenizer = AutoTokenizer.from_pretrained(base_model_name)
 
-            base_model = AutoModelForCausalLM.from_pretrained(
-                base_model_name,
-                torch_dtype=torch.float32,   # ✅ CPU-safe
-                low_cpu_mem_usage=True       # ✅ critical
-            )
+def merged_model_path(path=None):
+    return os.path.join(MERGED_CACHE_DIR, f"navarasa-merged-{adapter_fingerprint(path)}")
+
+
+def load_adapter_model(path=None, dtype=torch.float32, adapter_name="default"):
+    """Base model with the LoRA adapter applied at runtime (needs peft)."""
+    path = path or model_path
+    from peft import PeftModel
+
+    base_model = AutoModelForCausalLM.from_pretrained(
+        base_model_name,
+        torch_dtype=dtype,           # ✅ CPU-safe
+        low_cpu_mem_usage=True       # ✅ critical
+    )
+    return PeftModel.from_pretrained(base_model, path, adapter_name=adapter_name)
+
+
+def build_merged_model(path=None):
+    """
+    Merges the adapter into the base weights and writes the result (model +
+    tokenizer) to the merged cache. Returns the artifact directory; a no-op
+    when an artifact for this adapter already exists.
+    """
+    target = merged_model_path(path)
+    if os.path.isfile(os.path.join(target, "config.json")):
+        return target
+
+    print(f"[INFO] Merging LoRA adapter into base weights -> {target}")
+    merged = load_adapter_model(path).merge_and_unload()
+    tokenizer = AutoTokenizer.from_pretrained(base_model_name)
+
+    # Write to a scratch directory and rename, so a concurrent start never
+    # picks up a half-written artifact.
+    os.makedirs(MERGED_CACHE_DIR, exist_ok=True)
+    tmp_dir = f"{target}.tmp-{os.getpid()}"
+    merged.save_pretrained(tmp_dir, safe_serialization=True)
+    tokenizer.save_pretrained(tmp_dir)
+    try:
+        os.replace(tmp_dir, target)
+    except OSError:
+        # Another process published the same artifact first
+        import shutil
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return target
+
+
+def load_merged_model(path=None, dtype=torch.float32):
+    """Tokenizer and model loaded straight from the merged safetensors artifact."""
+    target = build_merged_model(path)
+    tokenizer = AutoTokenizer.from_pretrained(target)
+    model = AutoModelForCausalLM.from_pretrained(
+        target,
+        torch_dtype=dtype,
+        low_cpu_mem_usage=True
+    )
+    return tokenizer, model
+
+
+def mmap_weights_path(path=None, dtype=torch.float32):
+    dtype_name = str(dtype).replace("torch.", "")
+    return os.path.join(MERGED_CACHE_DIR, f"navarasa-merged-{adapter_fingerprint(path)}-{dtype_name}.pt")
+
+
+def build_mmap_weights(path=None, dtype=torch.float32):
+    """
+    Writes the merged weights in `dtype` as a single torch file that can be
+    memory-mapped. Non-persistent buffers (e.g. rotary frequencies) are
+    stored too, so loading needs no real initialization. No-op when present.
+    """
+    target = mmap_weights_path(path, dtype)
+    if os.path.isfile(target):
+        return target
+
+    merged_dir = build_merged_model(path)
+    print(f"[INFO] Preparing memory-mappable weights -> {target}")
+    model = AutoModelForCausalLM.from_pretrained(merged_dir, torch_dtype=dtype, low_cpu_mem_usage=True)
+    tmp_path = f"{target}.tmp-{os.getpid()}"
+    torch.save({"state_dict": model.state_dict(), "buffers": dict(model.named_buffers())}, tmp_path)
+    os.replace(tmp_path, target)
+    return target
+
+
+def load_mmap_model(path=None, dtype=torch.float32):
+    """
+    Builds the model skeleton on the meta device and points its parameters
+    straight at the memory-mapped weight file (assign=True), so no weight
+    memory is allocated or copied. Pages are only read, so they stay shared
+    through the page cache across processes.
+    """
+    merged_dir = build_merged_model(path)
+    weights_path = build_mmap_weights(path, dtype)
+
+    tokenizer = AutoTokenizer.from_pretrained(merged_dir)
+    with torch.device("meta"):
+        model = AutoModelForCausalLM.from_config(AutoConfig.from_pretrained(merged_dir), torch_dtype=dtype)
+
+    saved = torch.load(weights_path, mmap=True, weights_only=True)
+    model.load_state_dict(saved["state_dict"], assign=True)
+    for name, tensor in saved["buffers"].items():
+        module_name, _, buffer_name = name.rpartition(".")
+        module = model.get_submodule(module_name)
+        persistent = buffer_name not in module._non_persistent_buffers_set
+        module.register_buffer(buffer_name, tensor, persistent=persistent)
+    return tokenizer, model
+
+
+def onnx_model_path(path=None):
+    return os.path.join(MERGED_CACHE_DIR, f"navarasa-merged-{adapter_fingerprint(path)}-onnx")
+
+
+def build_onnx_model(path=None):
+    """
+    Exports the merged model to ONNX (decoder with past key/values, so
+    generation reuses the KV cache) and writes it with the tokenizer to the
+    cache. Returns the artifact directory; a no-op when already exported.
+    """
+    target = onnx_model_path(path)
+    if os.path.isfile(os.path.join(target, "config.json")):
+        return target
+
+    from optimum.onnxruntime import ORTModelForCausalLM
+
+    merged_dir = build_merged_model(path)
+    print(f"[INFO] Exporting merged model to ONNX -> {target}")
+    model = ORTModelForCausalLM.from_pretrained(merged_dir, export=True, use_cache=True)
+    tokenizer = AutoTokenizer.from_pretrained(merged_dir)
+
+    tmp_dir = f"{target}.tmp-{os.getpid()}"
+    model.save_pretrained(tmp_dir)
+    tokenizer.save_pretrained(tmp_dir)
+    try:
+        os.replace(tmp_dir, target)
+    except OSError:
+        # Another process published the same artifact first
+        import shutil
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return target
+
+
+def load_onnx_model(path=None, threads=None):
+    """Tokenizer and ONNX Runtime session (CPU execution provider) for the exported model."""
+    import onnxruntime
+    from optimum.onnxruntime import ORTModelForCausalLM
+
+    target = build_onnx_model(path)
+    threads = ONNX_THREADS if threads is None else threads
+    options = onnxruntime.SessionOptions()
+    options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+    if threads:
+        options.intra_op_num_threads = threads
+
+    tokenizer = AutoTokenizer.from_pretrained(target)
+    model = ORTModelForCausalLM.from_pretrained(
+        target,
+        use_cache=True,
+        provider="CPUExecutionProvider",
+        session_options=options,
+    )
+    return tokenizer, model
+
+
+def precision_load_dtype(precision):
+    # bf16 weights can be loaded directly; int8 quantizes from float32
+    return torch.bfloat16 if precision == "bfloat16" else torch.float32
+
+
+def apply_precision(model, precision):
+    """Converts a float32-loaded model to the requested inference precision."""
+    if precision == "float32":
+        return model
+    if precision == "bfloat16":
+        return model.to(torch.bfloat16)
+    if precision == "int8":
+        # LoRA A/B projections (adapter mode) stay in float: peft reads their
+        # .weight directly, which quantized modules do not expose
+        qconfig = torch.ao.quantization.default_dynamic_qconfig
+        spec = {
+            name: qconfig for name, module in model.named_modules()
+            if isinstance(module, torch.nn.Linear) and "lora_" not in name
+        }
+        return torch.ao.quantization.quantize_dynamic(model, spec, dtype=torch.qint8)
+    raise ValueError(f"Unknown precision '{precision}', expected one of {PRECISIONS}")
+
+
+def _load():
+    global _tokenizer, _model, _prefix_caches, _adapter_gate, _load_info
 
-            _model = PeftModel.from_pretrained(base_model, model_path)
-            _model.eval()
+    print(f"[INFO] Loading Navarasa model (lazy, backend={INFERENCE_BACKEND}, mode={SERVING_MODE}, precision={PRECISION})...")
+    _lifecycle.update(state="loading", error=None)
 
-            if _tokenizer.pad_token is None:
-                _tokenizer.pad_token = _tokenizer.eos_token
+    try:
+        start = time.perf_counter()
+        load_dtype = precision_load_dtype(PRECISION)
+
+        if INFERENCE_BACKEND == "onnx":
+            # The exported graph has the default adapter merged in, float32
+            # weights, and takes its KV cache as plain inputs/outputs
+            if len(MODEL_VARIANTS) > 1:
+                print(f"[WARNING] Model variants need the torch backend; serving only '{DEFAULT_VARIANT}'")
+            if PRECISION != "float32":
+                print(f"[WARNING] The onnx backend runs float32; ignoring precision '{PRECISION}'")
+            variants = list(served_variants())
+            tokenizer, model = load_onnx_model(MODEL_VARIANTS[DEFAULT_VARIANT][0])
+        elif INFERENCE_BACKEND != "torch":
+            raise ValueError(f"Unknown SYMPTOM_MODEL_BACKEND '{INFERENCE_BACKEND}' (expected torch or onnx)")
+        elif SERVING_MODE in ("merged", "mmap"):
+            if len(MODEL_VARIANTS) > 1:
+                print(f"[WARNING] Model variants need adapter mode; serving only '{DEFAULT_VARIANT}'")
+            variants = list(served_variants())
+            if SERVING_MODE == "mmap":
+                if PRECISION == "int8":
+                    print("[WARNING] int8 weights are re-packed per process and cannot stay shared")
+                tokenizer, model = load_mmap_model(MODEL_VARIANTS[DEFAULT_VARIANT][0], dtype=load_dtype)
+            else:
+                tokenizer, model = load_merged_model(MODEL_VARIANTS[DEFAULT_VARIANT][0], dtype=load_dtype)
+        else:
+            # Every adapter is attached to the same base weights, so each
+            # extra variant costs only its LoRA matrices
+            variants = list(served_variants())
+            tokenizer = AutoTokenizer.from_pretrained(base_model_name)
+            model = load_adapter_model(MODEL_VARIANTS[variants[0]][0], load_dtype, adapter_name=variants[0])
+            for name in variants[1:]:
+                model.load_adapter(MODEL_VARIANTS[name][0], adapter_name=name)
+        if INFERENCE_BACKEND == "torch":
+            model = apply_precision(model.eval(), PRECISION)
+
+        if tokenizer.pad_token is None:
+            tokenizer.pad_token = tokenizer.eos_token
+        # Decoder-only batching: pad on the left so every row continues
+        # generating right after its own prompt
+        tokenizer.padding_side = "left"
+
+        adapter_mode = INFERENCE_BACKEND == "torch" and SERVING_MODE == "adapter"
+        switch = model.set_adapter if adapter_mode else (lambda name: None)
+        prefix_caches = {}
+        for name in variants:
+            switch(name)
+            # The prefix KV cache is a torch Cache object; ONNX Runtime
+            # sessions get the full prompt instead
+            if PREFIX_CACHE_ENABLED and INFERENCE_BACKEND == "torch":
+                prefix_caches[name] = PromptPrefixCache(tokenizer, model)
+
+        _tokenizer, _model, _prefix_caches = tokenizer, model, prefix_caches
+        _adapter_gate = AdapterGate(switch)
+        if INFERENCE_BACKEND == "torch":
+            mode, precision = SERVING_MODE, PRECISION
+            dtype = str(next(model.parameters()).dtype).replace("torch.", "")
+        else:
+            mode, precision, dtype = "merged", "float32", "float32"
+        _load_info = {
+            "backend": INFERENCE_BACKEND,
+            "mode": mode,
+            "precision": precision,
+            "dtype": dtype,
+            "variants": variants,
+            "load_seconds": round(time.perf_counter() - start, 2),
+            "rss_mb": round(rss_mb(), 1),
+        }
+        _lifecycle["state"] = "loaded"
+        print(f"[INFO] Model loaded successfully {_load_info}")
+
+    except Exception as e:
+        print(f"[ERROR] Failed to load model: {e}")
+        _lifecycle.update(state="failed", error=str(e))
 
-            print("[INFO] Model loaded successfully")
-        
-        except Exception as e:
-            print(f"[ERROR] Failed to load model: {e}")
-            return None, None
+
+def get_model():
+    # Double-checked: concurrent first requests wait for a single load
+    # instead of each materializing their own copy of the weights.
+    if _model is None:
+        with _load_lock:
+            if _model is None:
+                _load()
 
     return _tokenizer, _model
 
 
+def model_info():
+    """Mode, precision, load time and RSS recorded by the last successful load."""
+    return dict(_load_info)
+
+
+def reset_model():
+    """Drops the loaded model so the next get_model() call reloads it."""
+    global _tokenizer, _model, _prefix_caches, _adapter_gate, _load_info
+    with _load_lock:
+        _tokenizer, _model, _prefix_caches, _adapter_gate, _load_info = None, None, {}, None, {}
+        _lifecycle.update(state="not_loaded", warm=False, warmup_seconds=None, error=None)
+
+
 # -------------------------------------------------------------
-# Language Detection (10 supported languages)
+# Lifecycle: background warm-up and readiness
 # -------------------------------------------------------------
-def detect_language(text):
-    for ch in text:
-        code = ord(ch)
-        if 0x0B80 <= code <= 0x0BFF:
-            return "ta"   # Tamil
-        elif 0x0900 <= code <= 0x097F:
-            return "mr" if "ळ" in text else "hi"  # Marathi / Hindi
-        elif 0x0C00 <= code <= 0x0C7F:
-            return "te"   # Telugu
-        elif 0x0D00 <= code <= 0x0D7F:
-            return "ml"   # Malayalam
-        elif 0x0C80 <= code <= 0x0CFF:
-            return "kn"   # Kannada
-        elif 0x0A80 <= code <= 0x0AFF:
-            return "gu"   # Gujarati
-        elif 0x0980 <= code <= 0x09FF:
-            return "as" if "ৰ" in text else "bn"  # Assamese / Bengali
-    return "en"  # English fallback
+# state: not_loaded -> loading -> loaded (or failed); "warm" once a dummy
+# prediction has gone through the full inference path.
+_load_lock = threading.Lock()
+_lifecycle = {"state": "not_loaded", "warm": False, "warmup_seconds": None, "error": None}
+
+
+def warm_up():
+    """Loads the model and runs one dummy prediction. Returns True when warm."""
+    start = time.perf_counter()
+    if CASCADE_ENABLED:
+        get_cascade()
+    _, model = get_model()
+    if model is None:
+        return False
+    try:
+        predict_batch(["fever, headache"])
+    except Exception as e:
+        print(f"[ERROR] Model warm-up failed: {e}")
+        _lifecycle.update(state="failed", error=f"warm-up: {e}")
+        return False
+    _lifecycle.update(warm=True, warmup_seconds=round(time.perf_counter() - start, 2))
+    print(f"[INFO] Model warm in {_lifecycle['warmup_seconds']}s")
+    return True
+
+
+def start_background_warmup():
+    thread = threading.Thread(target=warm_up, name="symptom-model-warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def is_ready():
+    return _lifecycle["state"] == "loaded" and _lifecycle["warm"]
+
+
+def model_status():
+    """Load state, timings, dtype and current RSS for the readiness probe."""
+    return {
+        **_lifecycle,
+        **_load_info,
+        "ready": is_ready(),
+        **memory_breakdown(),
+    }
 
-from deep_translator import GoogleTranslator
-from langdetect import detect, LangDetectException
 
 # -------------------------------------------------------------
-# Supported Languages (Navarasa Model)
+# Language Detection (10 supported languages, see models.language)
+# and translation of everything else (see models.translation)
 # -------------------------------------------------------------
-SUPPORTED_LANGUAGES = {'ta', 'mr', 'hi', 'te', 'ml', 'kn', 'gu', 'as', 'bn', 'en'}
+from models.language import SUPPORTED_LANGUAGES, detect_language
+from models.translation import get_translator
 
 # -------------------------------------------------------------
 # Disease Map (English – MASTER)
@@ -145,74 +510,540 @@ urgency_map = {
 # -------------------------------------------------------------
 # Generation-based Prediction
 # -------------------------------------------------------------
-def predict_disease_urgency(text):
-    # 1. Detect Language
-    try:
-        detected_lang = detect(text)
-    except LangDetectException:
-        detected_lang = 'en'
-    
-    # Check if manual override logic (unicode based) is needed or if langdetect is sufficient.
-    # We will trust langdetect mostly, but fallback to 'en' if unsure.
-    # Also, we explicitly support the 10 languages.
-    
-    processing_text = text
-    processing_lang = detected_lang
-
-    if detected_lang not in SUPPORTED_LANGUAGES:
-        print(f"[-] Language '{detected_lang}' not directly supported. Translating to English...")
-        try:
-            processing_text = GoogleTranslator(source='auto', target='en').translate(text)
-            processing_lang = 'en'
-        except Exception as e:
-            print(f"[!] Translation failed: {e}. Proceeding with original text.")
-            processing_lang = 'en' # Fallback assumption
-
-    # Format prompt for Navarasa instruction tuning
-    prompt = f"""### Instruction:
+# Format prompt for Navarasa instruction tuning. The prompt is split into a
+# static prefix (identical for every request) and the per-request suffix.
+PROMPT_PREFIX = """### Instruction:
 Based on these symptoms, predict the disease and urgency level (0=low, 1=medium, 2=high).
 
 ### Input:
-Symptoms: {processing_text}
+Symptoms:"""
+
+
+def build_prompt_suffix(symptoms):
+    return f""" {symptoms}
 
 ### Response:
 Disease: """
 
-    try:
-        tokenizer, model = get_model()
-    except Exception as e:
-        print(f"[ERROR] Model load failed: {e}")
-        return processing_lang, 22, 2
 
-    if model is None:
-        print("[WARNING] Model not loaded (returned None), returning mock prediction")
-        return processing_lang, 22, 2 # Heat Stroke fallback
+def build_prompt(symptoms):
+    return PROMPT_PREFIX + build_prompt_suffix(symptoms)
+
 
-    inputs = tokenizer(prompt, return_tensors="pt")
+# When enabled, the KV cache of PROMPT_PREFIX is computed once at load time
+# and each request only prefills its own suffix tokens.
+PREFIX_CACHE_ENABLED = os.environ.get("SYMPTOM_PREFIX_CACHE", "1") == "1"
 
-    with torch.no_grad():
-        outputs = model.generate(
-            **inputs,
-            max_new_tokens=50,
-            temperature=0.1,  # Low temperature for consistent predictions
-            do_sample=True,
-            pad_token_id=tokenizer.eos_token_id
+
+class PromptPrefixCache:
+    """
+    Token IDs and KV cache of the static instruction prefix. The stored
+    cache is never mutated; every request works on its own copy, so one
+    instance is safely shared across threads and batches.
+    """
+
+    def __init__(self, tokenizer, model):
+        self.input_ids = tokenizer(PROMPT_PREFIX, return_tensors="pt")["input_ids"]
+        with torch.no_grad():
+            self._past_key_values = model(input_ids=self.input_ids, use_cache=True).past_key_values
+
+    def __len__(self):
+        return self.input_ids.shape[1]
+
+    def expand(self, n):
+        """Private copy of the prefix cache for a batch of n rows."""
+        return _expand_cache(self._past_key_values, n)
+
+    def build_inputs(self, tokenizer, symptom_texts):
+        """
+        Full input_ids / attention_mask for a batch laid out as
+        [prefix | left-padded suffix]. Pads sit between prefix and suffix and
+        are masked out, so each row's positions continue right after the prefix.
+        """
+        suffix = tokenizer(
+            [build_prompt_suffix(t) for t in symptom_texts],
+            add_special_tokens=False, padding=True, return_tensors="pt",
+        )
+        n = len(symptom_texts)
+        prefix_ids = self.input_ids.expand(n, -1)
+        return {
+            "input_ids": torch.cat([prefix_ids, suffix["input_ids"]], dim=1),
+            "attention_mask": torch.cat(
+                [torch.ones_like(prefix_ids), suffix["attention_mask"]], dim=1
+            ),
+        }
+
+def prepare_inputs(texts):
+    """
+    Detects the language of each text and translates unsupported ones to
+    English. Texts that need translation are sent to the translator
+    concurrently, under one shared deadline.
+    Returns a list of (processing_lang, processing_text).
+    """
+    # 1. Detect Language (script based; langdetect only for Latin text)
+    detected = [detect_language(text, allow_unsupported=True) for text in texts]
+    prepared = [(lang, text) for lang, text in zip(detected, texts)]
+
+    # 2. Translate the unsupported ones
+    pending = [i for i, lang in enumerate(detected) if lang not in SUPPORTED_LANGUAGES]
+    if pending:
+        print(f"[-] Language(s) {sorted({detected[i] for i in pending})} not directly supported. Translating to English...")
+        translated = get_translator().translate_many(
+            [texts[i] for i in pending], source=[detected[i] for i in pending], target="en"
         )
+        for i, text in zip(pending, translated):
+            if text is None:
+                print("[!] Translation failed or timed out. Proceeding with original text.")
+                text = texts[i]
+            prepared[i] = ("en", text)  # Fallback assumption when translation failed
+    return prepared
+
 
-    full_response = tokenizer.decode(outputs[0], skip_special_tokens=True)
+def prepare_input(text):
+    """Detects the language and translates unsupported ones to English."""
+    return prepare_inputs([text])[0]
 
+
+def parse_response(full_response):
     # Extract numbers from response (Disease: X, Urgency: Y)
-    import re
     disease_match = re.search(r'Disease:\s*(\d+)', full_response)
     urgency_match = re.search(r'Urgency:\s*(\d+)', full_response)
 
     disease_id = int(disease_match.group(1)) if disease_match else 0
     urgency_id = int(urgency_match.group(1)) if urgency_match else 0
+    return disease_id, urgency_id
+
+
+# -------------------------------------------------------------
+# Decoding modes
+# -------------------------------------------------------------
+#   "sample" - free-text generation (temperature 0.1) + regex parsing
+#   "greedy" - deterministic argmax decoding + regex parsing
+#   "score"  - rank every disease ID by log-likelihood in one batched
+#              forward pass over a shared prompt prefix (deterministic,
+#              returns probabilities)
+# Score decoding runs the torch model's forward pass on a shared prefix
+# cache, so the onnx backend serves it as greedy; DECODING is the mode in
+# effect, DECODING_CONFIGURED what SYMPTOM_DECODING asked for.
+DECODING_CONFIGURED = os.environ.get("SYMPTOM_DECODING", "sample")
+DECODING = "greedy" if DECODING_CONFIGURED == "score" and INFERENCE_BACKEND == "onnx" else DECODING_CONFIGURED
+if DECODING != DECODING_CONFIGURED:
+    print(f"[WARNING] {DECODING_CONFIGURED.capitalize()} decoding needs the torch backend; using {DECODING} decoding")
+SCORE_TOP_K = int(os.environ.get("SYMPTOM_SCORE_TOP_K", "3"))
+# Candidates scored per forward pass; bounds the (chunk x tokens x vocab) logits
+SCORE_CHUNK_SIZE = int(os.environ.get("SYMPTOM_SCORE_CHUNK_SIZE", "32"))
+
+MAX_NEW_TOKENS = 50
+
+# Response layout the adapter was trained on: "Disease: <id>\nUrgency: <id>"
+URGENCY_HEADER = "\nUrgency: "
+
+# Generated text (after the prompt's trailing "Disease: ") holding a complete
+# disease ID followed by an urgency digit
+_FIELDS_COMPLETE = re.compile(r"^\s*\d+\D.*?Urgency:\s*\d", re.DOTALL)
+
+
+def is_deterministic():
+    """True when identical inputs always yield identical predictions."""
+    return DECODING in ("greedy", "score")
+
+
+class FieldsCompleteCriteria(StoppingCriteria):
+    """
+    Stops each row as soon as both the disease and urgency fields have been
+    generated, and remembers how many new tokens that took.
+    """
+
+    def __init__(self, tokenizer, prompt_len):
+        self.tokenizer = tokenizer
+        self.prompt_len = prompt_len
+        self.stopped_at = {}
+
+    def __call__(self, input_ids, scores, **kwargs):
+        texts = self.tokenizer.batch_decode(input_ids[:, self.prompt_len:], skip_special_tokens=True)
+        done = []
+        for row, text in enumerate(texts):
+            complete = bool(_FIELDS_COMPLETE.search(text))
+            if complete and row not in self.stopped_at:
+                self.stopped_at[row] = input_ids.shape[1] - self.prompt_len
+            done.append(complete)
+        return torch.tensor(done, dtype=torch.bool, device=input_ids.device)
+
+
+class CallbackStreamer(TextStreamer):
+    """Passes each newly decoded piece of generated text (prompt excluded) to a callback."""
+
+    def __init__(self, tokenizer, callback):
+        super().__init__(tokenizer, skip_prompt=True, skip_special_tokens=True)
+        self.callback = callback
+
+    def on_finalized_text(self, text, stream_end=False):
+        if text:
+            self.callback(text)
+
+
+_decode_stats_lock = threading.Lock()
+_decode_stats = {"requests": 0, "generated_tokens": 0, "early_stops": 0}
+
+
+def decoding_metrics():
+    with _decode_stats_lock:
+        stats = dict(_decode_stats)
+    stats["mode"] = DECODING
+    stats["configured_mode"] = DECODING_CONFIGURED
+    stats["avg_generated_tokens"] = (
+        round(stats["generated_tokens"] / stats["requests"], 2) if stats["requests"] else 0.0
+    )
+    return stats
+
+
+def _expand_cache(past_key_values, n):
+    """Copy of a batch-1 KV cache repeated n times along the batch axis."""
+    if hasattr(past_key_values, "batch_repeat_interleave"):
+        expanded = copy.deepcopy(past_key_values)
+        expanded.batch_repeat_interleave(n)
+        return expanded
+    # Legacy tuple-of-tuples cache
+    return tuple(tuple(t.repeat_interleave(n, dim=0) for t in layer) for layer in past_key_values)
+
+
+def score_continuations(model, prefix_out, prefix_len, candidates, pad_token_id):
+    """
+    Log-likelihood of each candidate token sequence given a prefix that has
+    already been run through the model (`prefix_out` holds its last logits
+    and KV cache). Only the candidate tokens are computed per row.
+    """
+    first_logprobs = prefix_out.logits[0, -1].float().log_softmax(-1)
+    scores = []
+
+    for start in range(0, len(candidates), SCORE_CHUNK_SIZE):
+        chunk = candidates[start:start + SCORE_CHUNK_SIZE]
+        width = max(len(c) for c in chunk)
+        input_ids = torch.full((len(chunk), width), pad_token_id, dtype=torch.long)
+        cand_mask = torch.zeros((len(chunk), width), dtype=torch.long)
+        for i, ids in enumerate(chunk):
+            input_ids[i, :len(ids)] = torch.tensor(ids)
+            cand_mask[i, :len(ids)] = 1
+
+        chunk_scores = first_logprobs[input_ids[:, 0]]
+        if width > 1:
+            # Right padding: pad positions come after every real token, so
+            # they never influence the scored ones and are masked out below
+            attention_mask = torch.cat(
+                [torch.ones((len(chunk), prefix_len), dtype=torch.long), cand_mask], dim=1
+            )
+            out = model(
+                input_ids=input_ids[:, :-1],
+                attention_mask=attention_mask[:, :-1],
+                past_key_values=_expand_cache(prefix_out.past_key_values, len(chunk)),
+                use_cache=True,
+            )
+            logprobs = out.logits.float().log_softmax(-1)
+            token_scores = logprobs.gather(-1, input_ids[:, 1:].unsqueeze(-1)).squeeze(-1)
+            chunk_scores = chunk_scores + (token_scores * cand_mask[:, 1:]).sum(dim=1)
+        scores.append(chunk_scores)
+
+    return torch.cat(scores)
+
+
+def _score_one(tokenizer, model, symptom_text, prefix_cache):
+    if prefix_cache is not None:
+        # Only the symptom suffix is prefilled on top of the cached instruction
+        inputs = prefix_cache.build_inputs(tokenizer, [symptom_text])
+        prefix_ids = inputs["input_ids"]
+        prefix_out = model(
+            input_ids=prefix_ids[:, len(prefix_cache):],
+            past_key_values=prefix_cache.expand(1),
+            use_cache=True,
+        )
+    else:
+        prefix_ids = tokenizer(build_prompt(symptom_text), return_tensors="pt")["input_ids"]
+        prefix_out = model(input_ids=prefix_ids, use_cache=True)
+
+    # 1. Disease: every ID followed by the line break that ends the field,
+    #    so "1" and "12" are distinct, complete candidates
+    disease_ids = sorted(disease_map_en)
+    candidates = [
+        tokenizer(f"{did}\n", add_special_tokens=False)["input_ids"] for did in disease_ids
+    ]
+    disease_scores = score_continuations(
+        model, prefix_out, prefix_ids.shape[1], candidates, tokenizer.pad_token_id
+    )
+    disease_probs = disease_scores.softmax(-1)
+    top = disease_probs.topk(min(SCORE_TOP_K, len(disease_ids)))
+    best = disease_ids[int(top.indices[0])]
+
+    # 2. Urgency: continue the prefix cache with the winning disease line
+    extension = tokenizer(f"{best}{URGENCY_HEADER}", add_special_tokens=False)["input_ids"]
+    ext_out = model(
+        input_ids=torch.tensor([extension]),
+        past_key_values=prefix_out.past_key_values,
+        use_cache=True,
+    )
+    urgency_ids = sorted(urgency_map["en"])
+    urgency_tokens = [
+        tokenizer(str(u), add_special_tokens=False)["input_ids"][0] for u in urgency_ids
+    ]
+    urgency_probs = ext_out.logits[0, -1].float()[urgency_tokens].softmax(-1)
+    urgency_best = int(urgency_probs.argmax())
+
+    return {
+        "disease_id": best,
+        "urgency_id": urgency_ids[urgency_best],
+        "confidence": round(float(top.values[0]), 4),
+        "urgency_confidence": round(float(urgency_probs[urgency_best]), 4),
+        "top_diseases": [
+            (disease_ids[int(i)], round(float(p), 4)) for p, i in zip(top.values, top.indices)
+        ],
+    }
+
+
+def _generate_batch(tokenizer, model, symptom_texts, prefix_cache, on_token=None):
+    if prefix_cache is not None:
+        inputs = prefix_cache.build_inputs(tokenizer, symptom_texts)
+        inputs["past_key_values"] = prefix_cache.expand(len(symptom_texts))
+    else:
+        prompts = [build_prompt(t) for t in symptom_texts]
+        inputs = tokenizer(prompts, return_tensors="pt", padding=True)
+    prompt_len = inputs["input_ids"].shape[1]
+
+    if DECODING == "greedy":
+        sampling = {"do_sample": False}
+    else:
+        sampling = {"do_sample": True, "temperature": 0.1}  # Low temperature for consistent predictions
+
+    stop = FieldsCompleteCriteria(tokenizer, prompt_len)
+    if on_token is not None:
+        sampling["streamer"] = CallbackStreamer(tokenizer, on_token)  # single-text calls only
+    outputs = model.generate(
+        **inputs,
+        max_new_tokens=MAX_NEW_TOKENS,
+        stopping_criteria=StoppingCriteriaList([stop]),
+        pad_token_id=tokenizer.eos_token_id,
+        **sampling
+    )
+
+    predictions = []
+    for row, output in enumerate(outputs):
+        disease_id, urgency_id = parse_response(tokenizer.decode(output, skip_special_tokens=True))
+        generated = stop.stopped_at.get(row)
+        if generated is None:
+            # Ran until EOS or the token budget; count up to and including EOS
+            new_tokens = output[prompt_len:].tolist()
+            eos = tokenizer.eos_token_id
+            generated = new_tokens.index(eos) + 1 if eos in new_tokens else len(new_tokens)
+        predictions.append({
+            "disease_id": disease_id,
+            "urgency_id": urgency_id,
+            "generated_tokens": generated,
+        })
+
+    with _decode_stats_lock:
+        _decode_stats["requests"] += len(predictions)
+        _decode_stats["generated_tokens"] += sum(p["generated_tokens"] for p in predictions)
+        _decode_stats["early_stops"] += len(stop.stopped_at)
+    return predictions
+
+
+def predict_batch(symptom_texts, variant=None, on_token=None):
+    """
+    Predicts several (already translated) symptom texts at once with one
+    model variant. Returns one dict per text with disease_id and urgency_id,
+    plus confidence and top_diseases in "score" mode. on_token (one text
+    only, generation modes) receives the generated text as it is decoded.
+    """
+    variant = variant or DEFAULT_VARIANT
+    try:
+        tokenizer, model = get_model()
+    except Exception as e:
+        print(f"[ERROR] Model load failed: {e}")
+        model = None
+
+    if model is None:
+        print("[WARNING] Model not loaded (returned None), returning mock prediction")
+        # Heat Stroke fallback, flagged so it is never cached or learned from
+        return [{"disease_id": 22, "urgency_id": 2, "mock": True} for _ in symptom_texts]
+
+    gate = _adapter_gate
+    gate.acquire(variant)
+    try:
+        prefix_cache = _prefix_caches.get(variant)
+        with torch.no_grad():
+            if DECODING == "score":
+                return [_score_one(tokenizer, model, t, prefix_cache) for t in symptom_texts]
+            return _generate_batch(tokenizer, model, symptom_texts, prefix_cache, on_token)
+    finally:
+        gate.release()
+
+
+def _predict_grouped(items):
+    """Batcher entry point: (variant, text) items, one predict_batch per variant."""
+    groups = {}
+    for index, (variant, text) in enumerate(items):
+        groups.setdefault(variant, []).append((index, text))
+
+    results = [None] * len(items)
+    for variant, members in groups.items():
+        predictions = predict_batch([text for _, text in members], variant)
+        for (index, _), prediction in zip(members, predictions):
+            results[index] = prediction
+    return results
+
+
+# -------------------------------------------------------------
+# Micro-batching
+# -------------------------------------------------------------
+# With batching enabled, concurrent requests arriving within the window are
+# grouped (up to the max size) into a single padded generate() call.
+BATCHING_ENABLED = os.environ.get("SYMPTOM_BATCHING", "0") == "1"
+BATCH_WINDOW_MS = float(os.environ.get("SYMPTOM_BATCH_WINDOW_MS", "20"))
+MAX_BATCH_SIZE = int(os.environ.get("SYMPTOM_MAX_BATCH_SIZE", "8"))
 
-    return processing_lang, disease_id, urgency_id
+_batcher = MicroBatcher(
+    _predict_grouped,
+    window_ms=BATCH_WINDOW_MS,
+    max_batch_size=MAX_BATCH_SIZE,
+    name="symptom-batcher",
+)
 
-def predict_multilingual(text):
-    lang, disease_id, urgency_id = predict_disease_urgency(text)
+
+def batching_metrics():
+    return {"enabled": BATCHING_ENABLED, **_batcher.metrics()}
+
+
+def resolve_variant(variant=None):
+    """
+    Requested variant name, or a weighted random pick when none is given.
+    Only served variants qualify, so predictions are never labelled with
+    an adapter that did not run.
+    """
+    variants = served_variants()
+    if not variant:
+        return choose_variant(variants)
+    if variant not in variants:
+        raise ValueError(f"Unknown or unserved model variant '{variant}', expected one of {list(variants)}")
+    return variant
+
+
+_variant_stats = VariantStats()
+
+
+def variant_metrics():
+    return _variant_stats.snapshot(served_variants())
+
+
+def _predict_prepared(processing_text, variant=None, on_token=None):
+    """LLM prediction for one already detected / translated symptom text."""
+    if on_token is not None:
+        # A streamed generation needs its own generate() call
+        return predict_batch([processing_text], variant, on_token)[0]
+    if BATCHING_ENABLED:
+        return _batcher.predict((variant, processing_text))
+    return predict_batch([processing_text], variant)[0]
+
+
+def predict_details(text, variant=None):
+    """Returns (processing_lang, prediction dict) for one symptom text."""
+    processing_lang, processing_text = prepare_input(text)
+    return processing_lang, _predict_prepared(processing_text, variant)
+
+# -------------------------------------------------------------
+# Inference cascade
+# -------------------------------------------------------------
+# With SYMPTOM_CASCADE=1 a char n-gram nearest-centroid classifier built
+# from the disease datasets shadows the LLM. It never answers: the LLM's
+# prediction is always served, and the classifier's would-be answer (above
+# the threshold, for diseases whose urgency the LLM has settled) is compared
+# with it in the background - see models.cascade and /metrics
+# symptom_cascade.
+CASCADE_ENABLED = os.environ.get("SYMPTOM_CASCADE", "0") == "1"
+CASCADE_THRESHOLD = float(os.environ.get("SYMPTOM_CASCADE_THRESHOLD", "0.6"))
+CASCADE_MIN_URGENCY_OBS = int(os.environ.get("SYMPTOM_CASCADE_MIN_URGENCY_OBS", "3"))
+
+_cascade = None
+_cascade_lock = threading.Lock()
+
+
+def get_cascade():
+    global _cascade
+    if _cascade is None:
+        with _cascade_lock:
+            if _cascade is None:
+                start = time.perf_counter()
+                classifier = CentroidClassifier(load_documents())
+                _cascade = Cascade(
+                    classifier,
+                    threshold=CASCADE_THRESHOLD,
+                    min_urgency_obs=CASCADE_MIN_URGENCY_OBS,
+                )
+                print(f"[INFO] Cascade classifier built in {time.perf_counter() - start:.2f}s")
+    return _cascade
+
+
+def cascade_metrics():
+    if not CASCADE_ENABLED:
+        return {"enabled": False}
+    return {"enabled": True, **get_cascade().metrics()}
+
+
+def _predict_cascaded(text, variant, on_token=None):
+    """(processing_lang, prediction, tier): always the LLM's, shadowed by the local classifier."""
+    processing_lang, processing_text = prepare_input(text)
+    prediction = _predict_prepared(processing_text, variant, on_token)
+    if CASCADE_ENABLED and not prediction.get("mock"):  # never learn from the mock fallback
+        get_cascade().shadow(processing_text, processing_lang, prediction["disease_id"], prediction["urgency_id"])
+    return processing_lang, prediction, "llm"
+
+
+def predict_disease_urgency(text, variant=None):
+    processing_lang, prediction = predict_details(text, variant)
+    return processing_lang, prediction["disease_id"], prediction["urgency_id"]
+
+# -------------------------------------------------------------
+# Prediction cache
+# -------------------------------------------------------------
+# Keyed by the canonical symptom list, so "Fever, headache" and
+# "headache and fever" share an entry. Only used when decoding is
+# deterministic - caching a sampled answer would freeze one random draw.
+_prediction_cache = PredictionCache(
+    maxsize=int(os.environ.get("SYMPTOM_CACHE_SIZE", "1024")),
+    ttl_seconds=float(os.environ.get("SYMPTOM_CACHE_TTL_S", "3600")),
+)
+
+
+def cache_metrics():
+    return {"enabled": is_deterministic(), **_prediction_cache.metrics()}
+
+
+def predict_multilingual(text, variant=None, on_token=None):
+    """
+    Full prediction for one symptom text in any language. on_token, if
+    given, is called with the generated text as the LLM decodes it (not for
+    cached or score-mode answers, which have no generation).
+    """
+    variant = resolve_variant(variant)
+    start = time.perf_counter()
+
+    if not is_deterministic():
+        _prediction_cache.record_bypass()
+        result = _predict_multilingual(text, variant, on_token)
+    else:
+        key = f"{variant}\x00{canonicalize(text)}"
+        result = _prediction_cache.get(key)
+        if result is None:
+            result = _predict_multilingual(text, variant, on_token)
+            # The mock fallback would outlive the model outage by the full TTL
+            if not result.get("mock"):
+                _prediction_cache.put(key, result)
+
+    _variant_stats.record(variant, time.perf_counter() - start, result["disease_id"], result["urgency_id"])
+    # Deep copy: callers must not be able to edit the cached top_diseases list
+    return copy.deepcopy(result)
+
+
+def _predict_multilingual(text, variant, on_token=None):
+    lang, prediction, tier = _predict_cascaded(text, variant, on_token)
+    disease_id, urgency_id = prediction["disease_id"], prediction["urgency_id"]
 
     # Map disease/urgency using the processing language (which matches our Maps)
     # If the original input was French -> detected 'fr' -> translated to 'en' -> lang='en'.
@@ -225,12 +1056,36 @@ def predict_multilingual(text):
         urgency_id, f"Unknown Urgency ({urgency_id})"
     )
 
-    return {
+    result = {
         "language": lang,
         "disease_id": disease_id,
         "disease": disease_name,
         "urgency_id": urgency_id,
-        "urgency": urgency_name
+        "urgency": urgency_name,
+        "model_variant": variant,
+        "tier": tier,
+    }
+    if prediction.get("mock"):
+        result["mock"] = True
+    if "generated_tokens" in prediction:
+        result["generated_tokens"] = prediction["generated_tokens"]
+    if "confidence" in prediction:
+        result["confidence"] = prediction["confidence"]
+        result["urgency_confidence"] = prediction["urgency_confidence"]
+        result["top_diseases"] = [
+            {"disease_id": did, "disease": disease_map_en[did], "probability": p}
+            for did, p in prediction["top_diseases"]
+        ]
+    return result
+
+def metrics():
+    return {
+        "symptom_batching": batching_metrics(),
+        "symptom_decoding": decoding_metrics(),
+        "symptom_cache": cache_metrics(),
+        "symptom_variants": variant_metrics(),
+        "symptom_translation": get_translator().metrics(),
+        "symptom_cascade": cascade_metrics(),
     }
 
 # -------------------------------------------------------------
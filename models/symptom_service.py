@@ -0,0 +1,60 @@
+import os
+
+# -------------------------------------------------------------
+# Symptom checker entry point for the web app
+# -------------------------------------------------------------
+# Without SYMPTOM_INFERENCE_SOCKET the model runs in-process (symptom_model).
+# With it, predictions go to a models.inference_server process over a Unix
+# socket and this process never imports torch, so web workers stay small.
+INFERENCE_SOCKET = os.environ.get("SYMPTOM_INFERENCE_SOCKET", "")
+INFERENCE_TIMEOUT_S = float(os.environ.get("SYMPTOM_INFERENCE_TIMEOUT_S", "30"))
+
+if INFERENCE_SOCKET:
+    from models.inference_client import InferenceClient
+
+    _authkey = os.environ.get("SYMPTOM_INFERENCE_AUTHKEY")
+    _client = InferenceClient(
+        INFERENCE_SOCKET,
+        timeout=INFERENCE_TIMEOUT_S,
+        authkey=_authkey.encode("utf-8") if _authkey else None,
+    )
+    _local = None
+else:
+    from models import symptom_model as _local
+    _client = None
+
+
+def predict_multilingual(text, variant=None, on_token=None):
+    # Generated tokens are only streamed in-process; the remote server
+    # answers in one message
+    if _client is not None:
+        return _client.predict_multilingual(text, variant)
+    return _local.predict_multilingual(text, variant, on_token)
+
+
+def start_background_warmup():
+    # A remote server warms itself up
+    if _local is not None:
+        _local.start_background_warmup()
+
+
+def model_status():
+    if _local is not None:
+        return _local.model_status()
+    try:
+        return {"backend": "remote", **_client.status(timeout=2)}
+    except Exception as e:
+        return {"backend": "remote", "state": "unreachable", "ready": False, "error": str(e)}
+
+
+def is_ready():
+    return bool(model_status().get("ready"))
+
+
+def metrics():
+    if _local is not None:
+        return _local.metrics()
+    try:
+        return _client.metrics(timeout=2)
+    except Exception as e:
+        return {"symptom_inference_server": {"error": str(e)}}
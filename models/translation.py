@@ -0,0 +1,397 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import Future, wait
+
+from models.prediction_cache import PredictionCache
+
+# -------------------------------------------------------------
+# Translation layer for languages the symptom model does not support
+# -------------------------------------------------------------
+# translate() checks an in-memory LRU, then an optional SQLite cache on
+# disk, and only then calls the backend - on a worker thread, so a slow
+# translator costs the request at most its deadline instead of stalling it.
+# deep_translator sends its request without a timeout, so a call that misses
+# its deadline is abandoned: it gives its worker slot back at once and
+# finishes (or hangs) on its own daemon thread. Up to WORKERS abandoned calls
+# may be outstanding; beyond that new calls fail fast until some return.
+#
+#   SYMPTOM_TRANSLATOR            google | dictionary | none   (default google)
+#   SYMPTOM_TRANSLATION_TIMEOUT_S per-call deadline            (default 5)
+#   SYMPTOM_TRANSLATION_CACHE     entries kept in memory       (default 2048)
+#   SYMPTOM_TRANSLATION_CACHE_DB  SQLite file for the disk cache, "" = off
+#   SYMPTOM_TRANSLATION_WORKERS   concurrent backend calls     (default 4)
+#   SYMPTOM_TRANSLATION_DICT      extra JSON dictionary for the dictionary backend
+TRANSLATOR_BACKEND = os.environ.get("SYMPTOM_TRANSLATOR", "google")
+TRANSLATION_TIMEOUT_S = float(os.environ.get("SYMPTOM_TRANSLATION_TIMEOUT_S", "5"))
+TRANSLATION_CACHE_SIZE = int(os.environ.get("SYMPTOM_TRANSLATION_CACHE", "2048"))
+TRANSLATION_CACHE_DB = os.environ.get("SYMPTOM_TRANSLATION_CACHE_DB", "")
+TRANSLATION_WORKERS = int(os.environ.get("SYMPTOM_TRANSLATION_WORKERS", "4"))
+TRANSLATION_DICT = os.environ.get("SYMPTOM_TRANSLATION_DICT", "")
+
+
+class TranslationError(RuntimeError):
+    pass
+
+
+class TranslationTimeout(TranslationError, TimeoutError):
+    pass
+
+
+# -------------------------------------------------------------
+# Backends
+# -------------------------------------------------------------
+class TranslationBackend(ABC):
+    """Translates one text. Implementations may block; the Translator adds deadlines."""
+
+    name = "base"
+
+    @abstractmethod
+    def translate(self, text, source, target):
+        """text translated from source (a detected code, possibly 'auto') into target."""
+
+
+class NullBackend(TranslationBackend):
+    """Returns the text unchanged (translation switched off)."""
+
+    name = "none"
+
+    def translate(self, text, source, target):
+        return text
+
+
+class GoogleBackend(TranslationBackend):
+    """deep_translator's GoogleTranslator (network)."""
+
+    name = "google"
+
+    def translate(self, text, source, target):
+        from deep_translator import GoogleTranslator
+        # The detected code is only used as a cache key; Google detects the
+        # source itself, which also covers codes it spells differently.
+        return GoogleTranslator(source="auto", target=target).translate(text)
+
+
+# Common symptom vocabulary of languages users write in that the model does
+# not cover. Good enough for tests and offline deployments, where an
+# approximate English symptom list beats passing the text through untouched.
+_BUILTIN_DICTIONARY = {
+    "fr": {
+        "fièvre": "fever", "mal de tête": "headache", "maux de tête": "headache",
+        "toux": "cough", "vomissements": "vomiting", "nausée": "nausea",
+        "diarrhée": "diarrhea", "fatigue": "fatigue", "douleur": "pain",
+        "frissons": "chills", "vertiges": "dizziness", "éruption cutanée": "rash",
+        "mal de gorge": "sore throat", "essoufflement": "shortness of breath",
+        "et": "and", "j'ai": "", "de la": "", "la": "", "le": "", "des": "",
+    },
+    "es": {
+        "fiebre": "fever", "dolor de cabeza": "headache", "tos": "cough",
+        "vómitos": "vomiting", "náuseas": "nausea", "diarrea": "diarrhea",
+        "cansancio": "fatigue", "fatiga": "fatigue", "dolor": "pain",
+        "escalofríos": "chills", "mareos": "dizziness", "sarpullido": "rash",
+        "dolor de garganta": "sore throat", "falta de aire": "shortness of breath",
+        "y": "and", "tengo": "",
+    },
+    "de": {
+        "fieber": "fever", "kopfschmerzen": "headache", "husten": "cough",
+        "erbrechen": "vomiting", "übelkeit": "nausea", "durchfall": "diarrhea",
+        "müdigkeit": "fatigue", "schmerzen": "pain", "schüttelfrost": "chills",
+        "schwindel": "dizziness", "ausschlag": "rash", "halsschmerzen": "sore throat",
+        "atemnot": "shortness of breath", "und": "and", "ich habe": "",
+    },
+    "pt": {
+        "febre": "fever", "dor de cabeça": "headache", "tosse": "cough",
+        "vômito": "vomiting", "náusea": "nausea", "diarreia": "diarrhea",
+        "cansaço": "fatigue", "dor": "pain", "calafrios": "chills",
+        "tontura": "dizziness", "erupção": "rash", "dor de garganta": "sore throat",
+        "falta de ar": "shortness of breath", "e": "and", "estou com": "",
+    },
+}
+
+
+class DictionaryBackend(TranslationBackend):
+    """
+    Phrase-by-phrase lookup in a local dictionary ({source: {phrase: target
+    text}}), longest phrase first. Words without an entry are kept as they
+    are. Only translates into English.
+    """
+
+    name = "dictionary"
+
+    def __init__(self, dictionary=None, path=None):
+        entries = {lang: dict(words) for lang, words in (dictionary or _BUILTIN_DICTIONARY).items()}
+        if path:
+            with open(path, encoding="utf-8") as f:
+                for lang, words in json.load(f).items():
+                    entries.setdefault(lang, {}).update(words)
+        self._patterns = {}
+        self._entries = {}
+        for lang, words in entries.items():
+            words = {k.casefold(): v for k, v in words.items()}
+            phrases = sorted(words, key=len, reverse=True)
+            self._entries[lang] = words
+            self._patterns[lang] = re.compile(
+                r"(?<!\w)(" + "|".join(map(re.escape, phrases)) + r")(?!\w)"
+            )
+
+    def _best_source(self, text):
+        return max(self._patterns, key=lambda lang: len(self._patterns[lang].findall(text)), default=None)
+
+    def translate(self, text, source, target):
+        if target != "en":
+            raise TranslationError(f"Dictionary backend only translates into English, not '{target}'")
+        folded = text.casefold()
+        lang = source if source in self._patterns else self._best_source(folded)
+        if lang is None:
+            return text
+        words = self._entries[lang]
+        translated = self._patterns[lang].sub(lambda m: words[m.group(1)], folded)
+        return " ".join(translated.split())
+
+
+def build_backend(name=None):
+    name = name or TRANSLATOR_BACKEND
+    if name == "google":
+        return GoogleBackend()
+    if name == "dictionary":
+        return DictionaryBackend(path=TRANSLATION_DICT or None)
+    if name == "none":
+        return NullBackend()
+    raise ValueError(f"Unknown SYMPTOM_TRANSLATOR '{name}' (expected google, dictionary or none)")
+
+
+# -------------------------------------------------------------
+# Disk cache
+# -------------------------------------------------------------
+class DiskCache:
+    """(text, source, target) -> translation in a SQLite file, shared across restarts and workers."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS translations ("
+                " source TEXT, target TEXT, text TEXT, translated TEXT,"
+                " PRIMARY KEY (source, target, text))"
+            )
+
+    def get(self, text, source, target):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT translated FROM translations WHERE source = ? AND target = ? AND text = ?",
+                (source, target, text),
+            ).fetchone()
+        return row[0] if row else None
+
+    def put(self, text, source, target, translated):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO translations VALUES (?, ?, ?, ?)",
+                (source, target, text, translated),
+            )
+
+
+# -------------------------------------------------------------
+# Translator
+# -------------------------------------------------------------
+class Translator:
+    """Cached, deadline-bounded front end for a TranslationBackend."""
+
+    def __init__(self, backend, cache_size=2048, disk_cache_path="", timeout_s=5.0, max_workers=4):
+        self.backend = backend
+        self.timeout = timeout_s
+        self.max_workers = max_workers
+        # Translations do not go stale, so entries only leave the LRU by eviction
+        self._memory = PredictionCache(maxsize=cache_size, ttl_seconds=float("inf"))
+        self._disk = DiskCache(disk_cache_path) if disk_cache_path else None
+        # Backend calls in flight: "active" ones hold one of max_workers slots,
+        # "abandoned" ones missed their deadline and only count against the
+        # same number of stuck calls allowed on top
+        self._calls_lock = threading.Condition()
+        self._active = 0
+        self._abandoned = set()
+        self._stats_lock = threading.Lock()
+        self._latencies = deque(maxlen=512)
+        self._counts = {"requests": 0, "disk_hits": 0, "backend_calls": 0, "timeouts": 0,
+                        "errors": 0, "rejected": 0}
+
+    def _count(self, key, n=1):
+        with self._stats_lock:
+            self._counts[key] += n
+
+    def _cached(self, text, source, target):
+        key = (text, source, target)
+        translated = self._memory.get(key)
+        if translated is None and self._disk is not None:
+            translated = self._disk.get(text, source, target)
+            if translated is not None:
+                self._count("disk_hits")
+                self._memory.put(key, translated)
+        return translated
+
+    def _call_backend(self, text, source, target):
+        start = time.perf_counter()
+        translated = self.backend.translate(text, source, target)
+        with self._stats_lock:
+            self._latencies.append(time.perf_counter() - start)
+        if not translated:
+            raise TranslationError("Backend returned an empty translation")
+        self._memory.put((text, source, target), translated)
+        if self._disk is not None:
+            self._disk.put(text, source, target, translated)
+        return translated
+
+    def _start(self, text, source, target, deadline):
+        """
+        Future for one backend call on its own daemon thread, once a worker
+        slot is free before the deadline. None when no slot freed up in time;
+        raises TranslationError while too many abandoned calls are stuck.
+        """
+        with self._calls_lock:
+            if len(self._abandoned) >= self.max_workers:
+                raise TranslationError(
+                    f"Translation backend unresponsive ({len(self._abandoned)} calls stuck)"
+                )
+            while self._active >= self.max_workers:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self._calls_lock.wait(remaining)
+            self._active += 1
+
+        future = Future()
+        future.set_running_or_notify_cancel()
+
+        def run():
+            try:
+                future.set_result(self._call_backend(text, source, target))
+            except BaseException as e:
+                future.set_exception(e)
+            finally:
+                with self._calls_lock:
+                    if future in self._abandoned:
+                        self._abandoned.discard(future)
+                    else:
+                        self._active -= 1
+                    self._calls_lock.notify()
+
+        threading.Thread(target=run, name="translate", daemon=True).start()
+        return future
+
+    def _abandon(self, future):
+        """Frees the slot of a call that missed its deadline; it keeps running and still fills the cache."""
+        with self._calls_lock:
+            if not future.done() and future not in self._abandoned:
+                self._abandoned.add(future)
+                self._active -= 1
+                self._calls_lock.notify()
+
+    def translate(self, text, source="auto", target="en", timeout=None):
+        """Translation of text; raises TranslationTimeout / TranslationError."""
+        return self.translate_many([text], source, target, timeout, raise_errors=True)[0]
+
+    def translate_many(self, texts, source="auto", target="en", timeout=None, raise_errors=False):
+        """
+        Translates several texts, calling the backend concurrently for the
+        ones not cached. All of them share one deadline. source is one code
+        for all texts or a list with one code per text. Entries that fail or
+        time out are None (or raise, with raise_errors=True).
+        """
+        timeout = self.timeout if timeout is None else timeout
+        sources = [source] * len(texts) if isinstance(source, str) else list(source)
+        requests = list(zip(texts, sources))
+        self._count("requests", len(requests))
+        results = {}
+        pending = []
+        for text, src in dict.fromkeys(requests):
+            translated = self._cached(text, src, target)
+            if translated is not None:
+                results[(text, src)] = translated
+            else:
+                pending.append((text, src))
+
+        if pending:
+            self._count("backend_calls", len(pending))
+            deadline = time.monotonic() + timeout
+            futures = {}
+            error = None
+            timed_out = 0
+            for text, src in pending:
+                try:
+                    future = self._start(text, src, target, deadline)
+                except TranslationError as e:
+                    self._count("rejected")
+                    error = error or e
+                    continue
+                if future is None:
+                    timed_out += 1
+                else:
+                    futures[future] = (text, src)
+            done, not_done = wait(futures, timeout=max(0.0, deadline - time.monotonic()))
+            for future in not_done:
+                self._abandon(future)
+            timed_out += len(not_done)
+            self._count("timeouts", timed_out)
+            for future in done:
+                try:
+                    results[futures[future]] = future.result()
+                except Exception as e:
+                    self._count("errors")
+                    error = error or e
+            if raise_errors and timed_out:
+                raise TranslationTimeout(f"Translation did not finish within {timeout}s")
+            if raise_errors and error is not None:
+                raise TranslationError(f"Translation failed: {error}") from error
+
+        return [results.get(request) for request in requests]
+
+    def metrics(self):
+        memory = self._memory.metrics()
+        with self._stats_lock:
+            counts = dict(self._counts)
+            latencies = sorted(self._latencies)
+        with self._calls_lock:
+            active, stuck = self._active, len(self._abandoned)
+        requests = counts["requests"]
+        cached = requests - counts["backend_calls"]
+        return {
+            "backend": self.backend.name,
+            "timeout_s": self.timeout,
+            "max_workers": self.max_workers,
+            **counts,
+            "in_flight": active,
+            "stuck": stuck,
+            "memory_hits": memory["hits"],
+            "memory_size": memory["size"],
+            "disk_cache": self._disk.path if self._disk is not None else None,
+            "hit_rate": round(cached / requests, 4) if requests else 0.0,
+            "avg_latency_ms": round(sum(latencies) / len(latencies) * 1000, 1) if latencies else 0.0,
+            "p95_latency_ms": round(latencies[int(0.95 * (len(latencies) - 1))] * 1000, 1) if latencies else 0.0,
+        }
+
+
+_translator = None
+_translator_lock = threading.Lock()
+
+
+def get_translator():
+    """Process-wide Translator configured from the environment."""
+    global _translator
+    if _translator is None:
+        with _translator_lock:
+            if _translator is None:
+                _translator = Translator(
+                    build_backend(),
+                    cache_size=TRANSLATION_CACHE_SIZE,
+                    disk_cache_path=TRANSLATION_CACHE_DB,
+                    timeout_s=TRANSLATION_TIMEOUT_S,
+                    max_workers=TRANSLATION_WORKERS,
+                )
+    return _translator
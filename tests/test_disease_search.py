@@ -0,0 +1,43 @@
+from models.disease_search import DiseaseSearchIndex
+from models.knowledge_store import get_store
+
+NAMES = [
+    ("hypertension", "Hypertension", "2", "en"),
+    ("high blood pressure", "High Blood Pressure", "2", "en"),
+    ("azotemia", "Azotemia", "82", "en"),
+    ("high blood urea", "High Blood Urea", "82", "en"),
+    ("diabetes", "Diabetes", "1", "en"),
+]
+
+
+def top(index, query):
+    return index.search(query, limit=1)[0][2]
+
+
+def test_typos_and_prefixes():
+    index = DiseaseSearchIndex(NAMES)
+    assert top(index, "diabetis") == "1"
+    assert top(index, "hyper") == "2"
+
+
+def test_abbreviated_words_match_initials():
+    index = DiseaseSearchIndex(NAMES)
+    assert top(index, "high bp") == "2"
+    assert top(index, "bp") == "2"
+    assert top(index, "blood pressure high") == "2"
+
+
+def test_high_bp_ranks_hypertension_first():
+    results = get_store().search("high bp")
+    assert results[0]["name"] == "Hypertension"
+    assert get_store().find_id("high bp", fuzzy=True) == "2"
+
+
+def test_names_fall_back_to_the_matched_language():
+    # Disease 109 has no English entry
+    store = get_store()
+    name = store.disease("109", "hi").disease_name
+    for lang in ("en", "fr", None):
+        results = store.search(name, lang=lang)
+        assert results[0]["disease_id"] == "109"
+        assert results[0]["name"] == name
@@ -0,0 +1,65 @@
+import json
+
+import pytest
+
+from models import knowledge_store
+from models.knowledge_store import KnowledgeStore
+
+DISEASES = [
+    {"disease_label": 2, "lang": "en", "disease_name": "Hypertension",
+     "aliases": ["High Blood Pressure"], "symptoms": ["headache", "dizziness"]},
+    {"disease_label": 2, "lang": "fr", "disease_name": "Hypertension artérielle"},
+    {"disease_label": 1, "lang": "en", "disease_name": "Diabetes", "definitions": "High blood sugar."},
+]
+RECOMMENDATIONS = [
+    {"disease_id": 2, "lang": "en", "recommendation": {"do": ["Reduce salt"], "dont": ["Smoke"]}},
+]
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(knowledge_store, "SNAPSHOT_DIR", str(tmp_path / "cache"))
+    (tmp_path / "disease.json").write_text(json.dumps(DISEASES), encoding="utf-8")
+    (tmp_path / "recommendation.json").write_text(json.dumps(RECOMMENDATIONS), encoding="utf-8")
+    return str(tmp_path)
+
+
+def test_snapshot_rebuilds_the_same_store(data_dir):
+    built = KnowledgeStore(data_dir=data_dir)
+    loaded = KnowledgeStore(data_dir=data_dir)
+    assert (built.loaded_from, loaded.loaded_from) == ("json", "snapshot")
+    assert loaded._diseases == built._diseases
+    assert loaded._recommendations == built._recommendations
+    assert loaded._names == built._names
+    assert loaded.search_index.search("high bp") == built.search_index.search("high bp")
+    # Short strings stay interned, shared with every other store
+    assert loaded.disease("2", "fr").lang is built.disease("2", "fr").lang
+
+
+def test_damaged_or_stale_snapshot_is_rebuilt(data_dir):
+    store = KnowledgeStore(data_dir=data_dir)
+    with open(store.snapshot_path, "r+b") as f:
+        f.seek(-1, 2)
+        f.write(b"\0")
+    assert KnowledgeStore(data_dir=data_dir).loaded_from == "json"
+    assert KnowledgeStore(data_dir=data_dir).loaded_from == "snapshot"
+
+    with open(store.sources[0], "w", encoding="utf-8") as f:
+        json.dump(DISEASES[:1], f)
+    assert KnowledgeStore(data_dir=data_dir).loaded_from == "json"
+
+
+def test_dataset_loads_without_its_fallback(tmp_path, monkeypatch):
+    plain = knowledge_store.DATASETS["plain"]
+    monkeypatch.setattr(knowledge_store, "DATASETS", {"default": ("missing.json", "missing1.json"), "plain": plain})
+    monkeypatch.setattr(knowledge_store, "FALLBACK_DATASET", "default")
+    monkeypatch.setattr(knowledge_store, "SNAPSHOT_DIR", str(tmp_path))
+    monkeypatch.setattr(knowledge_store, "KNOWLEDGE_WATCH_INTERVAL_S", 0)
+    monkeypatch.setattr(knowledge_store, "_stores", {})
+
+    store = knowledge_store.get_store("plain")
+    assert list(knowledge_store._stores) == ["plain"]
+    assert store.version == store.checksum[:12]
+    assert store.disease("1").disease_name
+    assert store.disease("100") is None and store.recommendation("100") is None
+    assert store.stats()["fallback_error"]
@@ -0,0 +1,109 @@
+"""
+Parity of the ONNX Runtime backend with eager PyTorch on the merged model.
+
+A tiny randomly initialised Gemma with a LoRA adapter stands in for the
+real checkpoint, so the test runs offline in seconds while exercising the
+same merge -> ONNX export -> ORT session path as the onnx backend.
+Skipped when optimum[onnxruntime] is not installed. Run from the backend
+directory:
+    python -m pytest tests
+"""
+import string
+
+import pytest
+import torch
+
+pytest.importorskip("onnxruntime")
+pytest.importorskip("optimum.onnxruntime")
+
+from peft import LoraConfig, get_peft_model
+from tokenizers import Tokenizer, decoders, models as tokenizer_models, pre_tokenizers
+from tokenizers.processors import TemplateProcessing
+from transformers import GemmaConfig, GemmaForCausalLM, PreTrainedTokenizerFast
+
+from models import symptom_model
+
+SYMPTOMS = [
+    "high fever, severe joint pain, rash, headache behind the eyes",
+    "frequent urination, excessive thirst, blurred vision",
+    "wheezing, shortness of breath, chest tightness at night",
+]
+ATOL = 1e-3
+NEW_TOKENS = 8
+
+
+def make_tiny_checkpoint(base_dir, adapter_dir):
+    """Character-level tokenizer, 2-layer Gemma and a non-trivial LoRA adapter."""
+    vocab = {"<pad>": 0, "<eos>": 1, "<bos>": 2, "<unk>": 3}
+    for ch in string.printable:
+        vocab.setdefault(ch, len(vocab))
+    tok = Tokenizer(tokenizer_models.WordLevel(vocab, unk_token="<unk>"))
+    tok.pre_tokenizer = pre_tokenizers.Split("", "isolated")
+    tok.decoder = decoders.Fuse()
+    tok.post_processor = TemplateProcessing(single="<bos> $A", special_tokens=[("<bos>", 2)])
+    tokenizer = PreTrainedTokenizerFast(tokenizer_object=tok, bos_token="<bos>", eos_token="<eos>",
+                                        pad_token="<pad>", unk_token="<unk>",
+                                        model_input_names=["input_ids", "attention_mask"])
+
+    torch.manual_seed(0)
+    config = GemmaConfig(vocab_size=len(vocab), hidden_size=64, intermediate_size=128, num_hidden_layers=2,
+                         num_attention_heads=4, num_key_value_heads=1, head_dim=16,
+                         max_position_embeddings=512, pad_token_id=0, eos_token_id=1, bos_token_id=2)
+    GemmaForCausalLM(config).save_pretrained(base_dir)
+    tokenizer.save_pretrained(base_dir)
+
+    lora = LoraConfig(r=4, lora_alpha=8, target_modules=["q_proj", "k_proj", "v_proj", "o_proj"],
+                      task_type="CAUSAL_LM", init_lora_weights=False)
+    get_peft_model(GemmaForCausalLM.from_pretrained(base_dir), lora).save_pretrained(adapter_dir)
+
+
+@pytest.fixture(scope="module")
+def backends(tmp_path_factory):
+    root = tmp_path_factory.mktemp("onnx_parity")
+    base_dir, adapter_dir = str(root / "base"), str(root / "adapter")
+    make_tiny_checkpoint(base_dir, adapter_dir)
+
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(symptom_model, "base_model_name", base_dir)
+        patch.setattr(symptom_model, "MERGED_CACHE_DIR", str(root / "cache"))
+        patch.setattr(symptom_model, "DECODING", "greedy")
+        loaded = {
+            "torch": symptom_model.load_merged_model(adapter_dir),
+            "onnx": symptom_model.load_onnx_model(adapter_dir),
+        }
+        for tokenizer, _ in loaded.values():
+            tokenizer.padding_side = "left"
+        loaded["torch"][1].eval()
+        yield loaded
+
+
+def encode(tokenizer):
+    return tokenizer([symptom_model.build_prompt(t) for t in SYMPTOMS], return_tensors="pt", padding=True)
+
+
+def test_next_token_logits_match(backends):
+    logits = {}
+    for name, (tokenizer, model) in backends.items():
+        with torch.no_grad():
+            logits[name] = model(**encode(tokenizer)).logits[:, -1].float()
+    assert torch.allclose(logits["torch"], logits["onnx"], atol=ATOL)
+
+
+def test_greedy_generation_matches(backends):
+    generated = {}
+    for name, (tokenizer, model) in backends.items():
+        with torch.no_grad():
+            generated[name] = model.generate(**encode(tokenizer), max_new_tokens=NEW_TOKENS, min_new_tokens=NEW_TOKENS,
+                                             do_sample=False, pad_token_id=tokenizer.eos_token_id)
+    assert torch.equal(generated["torch"], generated["onnx"])
+
+
+def test_predictions_match(backends):
+    predictions = {}
+    for name, (tokenizer, model) in backends.items():
+        with torch.no_grad():
+            predictions[name] = [
+                (p["disease_id"], p["urgency_id"])
+                for p in symptom_model._generate_batch(tokenizer, model, SYMPTOMS, None)
+            ]
+    assert predictions["torch"] == predictions["onnx"]
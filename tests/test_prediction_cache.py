@@ -0,0 +1,17 @@
+from models.prediction_cache import canonicalize
+
+
+def test_order_case_and_conjunctions_do_not_matter():
+    assert canonicalize("Headache and FEVER, body pain") == "body pain|fever|headache"
+    assert canonicalize("body pain. fever and headache") == "body pain|fever|headache"
+
+
+def test_decimals_stay_one_phrase():
+    assert canonicalize("fever 38.5 and cough") == "cough|fever 38.5"
+    assert canonicalize("fever 38.5 and cough") != canonicalize("fever 39.5 and cough")
+    assert canonicalize("cough and fever 38.5") == canonicalize("fever 38.5. cough.")
+
+
+def test_readings_with_slash_stay_one_phrase():
+    assert canonicalize("bp 140/90, headache") == "bp 140/90|headache"
+    assert canonicalize("headache/dizziness") == "dizziness|headache"